@@ -0,0 +1,102 @@
+import sys
+import json
+import time
+import argparse
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dispatch import Dispatcher
+from core import TRANSPORTS, send, set_transport, set_dispatcher
+
+class StandInHandler(BaseHTTPRequestHandler):
+    '''
+    Answers webhook executions like Discord does with ?wait=true.
+    '''
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes, Nagle would hold the body back
+    # for the client's delayed ACK and cap every connection at ~25 requests/s.
+    disable_nagle_algorithm = True
+    message_ids = itertools.count(1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.connections.add(self.client_address)
+        body = json.dumps({'id': str(next(self.message_ids))}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_PATCH = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def serve_stand_in(ports):
+    server = start_stand_in()
+    ports.put(server.server_port)
+    threading.Event().wait()  # serves until the parent terminates it
+
+def start_stand_in_processes(count):
+    # Separate processes, so the stand-in doesn't compete with the clients
+    # it measures for one interpreter.
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    processes = [
+        context.Process(target=serve_stand_in, args=(ports,), daemon=True)
+        for _ in range(count)
+    ]
+    for process in processes:
+        process.start()
+    return processes, [ports.get() for _ in processes]
+
+def run_backend(name, server, messages, concurrency):
+    set_transport(TRANSPORTS[name]())
+    # Unthrottled, the stand-in has no rate limits to respect.
+    set_dispatcher(Dispatcher())
+    server.connections.clear()
+    url = f'http://127.0.0.1:{server.server_port}/api/webhooks/{{}}/token'
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(
+            lambda index: send(url.format(index % concurrency + 1), '', '', f'message {index}', [], ''),
+            range(messages),
+        ))
+    elapsed = time.perf_counter() - started
+    set_transport(None)
+    return messages / elapsed, len(server.connections)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Compare transport backends against a local stand-in server'
+    )
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--backends', nargs='+', default=list(TRANSPORTS))
+    args = parser.parse_args(argv)
+    server = start_stand_in()
+    print(f'{"backend":<10}{"msg/s":>10}{"connections":>13}')
+    for name in args.backends:
+        try:
+            rate, connections = run_backend(name, server, args.messages, args.concurrency)
+        except ImportError as error:
+            print(f'{name:<10}  skipped: {error}')
+            continue
+        print(f'{name:<10}{rate:>10.0f}{connections:>13}')
+    # The stand-in only speaks HTTP/1.1, so httpx falls back to it here and
+    # this measures client overhead rather than HTTP/2 multiplexing.
+    server.shutdown()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
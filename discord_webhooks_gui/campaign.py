@@ -0,0 +1,291 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import traceback
+import tempfile
+import multiprocessing
+from queue import Full
+from dispatch import Dispatcher
+from planner import SendPlan
+from core import (
+    send,
+    load_config,
+    set_dispatcher,
+    embed_creation,
+    embed_dict_from_payload,
+    webhook_id,
+    WebhookUnavailable,
+    PartialSendError,
+)
+
+# Campaign files hold one JSON message per line:
+# {"webhook": url, "content": str, "username": str, "avatar_url": str,
+#  "embeds": [Discord embed objects], "file": path}
+
+
+def read_campaign(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def shard_for(record, shards):
+    # All messages of a webhook land on the same shard, which sends them in order.
+    return (webhook_id(record['webhook']) or 0) % shards
+
+def record_message(record):
+    return (
+        record['webhook'],
+        record.get('avatar_url', ''),
+        record.get('username', ''),
+        record.get('content', ''),
+        [embed_creation(embed_dict_from_payload(embed)) for embed in record.get('embeds', [])],
+        record.get('file', ''),
+    )
+
+def send_record(record):
+    send(*record_message(record))
+
+def unsent_records(record, parts):
+    # One record per part left to send, the file goes with the last one as
+    # it did in send.
+    records = []
+    for part in parts:
+        unsent = {key: value for key, value in record.items() if key != 'file'}
+        unsent['content'] = part['content']
+        unsent['embeds'] = [embed.to_dict() for embed in part['embeds']]
+        records.append(unsent)
+    if 'file' in record:
+        records[-1]['file'] = record['file']
+    return records
+
+def shard_worker(shard, queue, results, stop, rate):
+    # The parent handles Ctrl+C and tells the shards to stop through the event.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # The shards split the global rate limit between them.
+    dispatcher = Dispatcher(rate)
+    set_dispatcher(dispatcher)
+    last_stats = time.monotonic()
+    while True:
+        item = queue.get()
+        if item is None or stop.is_set():
+            break
+        index, record = item
+        try:
+            send_record(record)
+        except WebhookUnavailable:
+            # Once a webhook's breaker is open the rest of its messages fail
+            # here without a request, and are set aside to be sent again later.
+            results.put((index, 'parked', [record]))
+        except PartialSendError as error:
+            # Parking the whole record would post the delivered parts twice.
+            results.put((index, 'parked', unsent_records(record, error.unsent)))
+        except Exception:
+            results.put((index, 'failed', traceback.format_exc()))
+        else:
+            results.put((index, 'sent', None))
+        if time.monotonic() - last_stats >= 1:
+            last_stats = time.monotonic()
+            results.put((shard, 'lanes', dispatcher.stats()))
+    results.put((shard, 'lanes', dispatcher.stats()))
+    results.put(None)
+
+class Progress:
+    def __init__(self, shards, parked_path, out=sys.stderr):
+        self.shards = shards
+        self.parked_path = parked_path
+        self.out = out
+        self.sent = 0
+        self.failed = 0
+        self.parked = 0
+        self.errors = []
+        self.shard_lanes = {}
+        self.started = time.monotonic()
+
+    def collect(self, results):
+        finished = 0
+        last_report = 0
+        while finished < self.shards:
+            item = results.get()
+            if item is None:
+                finished += 1
+                continue
+            index, status, detail = item
+            if status == 'lanes':
+                self.shard_lanes[index] = detail
+                continue
+            if status == 'sent':
+                self.sent += 1
+            elif status == 'parked':
+                self.parked += 1
+                with open(self.parked_path, 'a', encoding='utf-8') as file:
+                    for record in detail:
+                        file.write(json.dumps(record) + '\n')
+            else:
+                self.failed += 1
+                self.errors.append((index, detail))
+            if time.monotonic() - last_report >= 1:
+                last_report = time.monotonic()
+                self.report()
+        self.report()
+
+    def lane_stats(self):
+        # Each shard has its own dispatcher, the lanes are summed across them.
+        lanes = {}
+        for stats in self.shard_lanes.values():
+            for lane, lane_stats in stats.items():
+                total = lanes.setdefault(
+                    lane, {'depth': 0, 'granted': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+                )
+                total['depth'] += lane_stats['depth']
+                total['granted'] += lane_stats['granted']
+                total['total_wait'] += lane_stats['mean_wait'] * lane_stats['granted']
+                total['max_wait'] = max(total['max_wait'], lane_stats['max_wait'])
+        return {
+            lane: {
+                'depth': total['depth'],
+                'granted': total['granted'],
+                'mean_wait': total['total_wait'] / total['granted'] if total['granted'] else 0.0,
+                'max_wait': total['max_wait'],
+            }
+            for lane, total in lanes.items()
+        }
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.sent / elapsed if elapsed else 0
+        print(
+            f'sent {self.sent}  failed {self.failed}  parked {self.parked}  '
+            f'{rate:.1f} msg/s',
+            file=self.out,
+        )
+        for lane, stats in self.lane_stats().items():
+            if stats['granted'] or stats['depth']:
+                print(
+                    f'  {lane}: {stats["granted"]} requests  {stats["depth"]} waiting  '
+                    f'wait {stats["mean_wait"] * 1000:.0f} ms mean, '
+                    f'{stats["max_wait"] * 1000:.0f} ms max',
+                    file=self.out,
+                )
+
+def run_campaign(path, shards, rate='config', out=sys.stderr):
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    results = context.Queue()
+    queues = [context.Queue(maxsize=1000) for _ in range(shards)]
+    if rate == 'config':
+        rate = load_config()['rate_limit']
+    workers = [
+        context.Process(
+            target=shard_worker,
+            args=(shard, queue, results, stop, rate / shards if rate else None),
+        )
+        for shard, queue in enumerate(queues)
+    ]
+    for worker in workers:
+        worker.start()
+    progress = Progress(shards, path + '.parked', out)
+    collector = threading.Thread(target=progress.collect, args=(results,))
+    collector.start()
+    try:
+        for index, record in enumerate(read_campaign(path)):
+            queues[shard_for(record, shards)].put((index, record))
+    except KeyboardInterrupt:
+        print('Stopping, waiting for the messages in flight', file=sys.stderr)
+        stop.set()
+    finally:
+        for queue in queues:
+            try:
+                queue.put(None, block=not stop.is_set())
+            except Full:
+                pass  # the shard exits on its next item once stop is set
+        collector.join()
+        for worker in workers:
+            worker.join()
+    return progress
+
+def plan_campaign(path):
+    plan = SendPlan(load_config()['rate_limit'])
+    for index, record in enumerate(read_campaign(path)):
+        try:
+            plan.add(*record_message(record))
+        except Exception as error:
+            plan.errors.append((index, str(error)))
+    return plan
+
+def scaling_benchmark(messages, max_shards, webhooks=64):
+    # Imported here, the stand-in is only needed by the benchmark.
+    from benchmark import start_stand_in_processes
+    servers, ports = start_stand_in_processes(max_shards)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'campaign.jsonl')
+    with open(path, 'w', encoding='utf-8') as file:
+        for index in range(messages):
+            file.write(json.dumps({
+                'webhook': (
+                    f'http://127.0.0.1:{ports[index % webhooks % len(ports)]}'
+                    f'/api/webhooks/{index % webhooks + 1}/token'
+                ),
+                'content': f'message {index}',
+            }) + '\n')
+    print(f'{"shards":>6}{"msg/s":>10}{"speedup":>9}')
+    baseline = None
+    try:
+        with open(os.devnull, 'w') as devnull:
+            for shards in range(1, max_shards + 1):
+                started = time.perf_counter()
+                # The stand-in has no rate limits, so the shards run unthrottled.
+                progress = run_campaign(path, shards, rate=None, out=devnull)
+                rate = progress.sent / (time.perf_counter() - started)
+                baseline = baseline or rate
+                print(f'{shards:>6}{rate:>10.0f}{rate / baseline:>8.1f}x')
+    finally:
+        for server in servers:
+            server.terminate()
+        os.remove(path)
+        os.rmdir(directory)
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Send a campaign of webhook messages')
+    parser.add_argument('campaign', nargs='?', help='JSON lines file, one message per line')
+    parser.add_argument(
+        '--shards', type=int, default=multiprocessing.cpu_count(),
+        help='worker processes, messages are sharded by webhook id',
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='report requests, bytes and the estimated time without sending',
+    )
+    parser.add_argument(
+        '--scaling', type=int, metavar='MESSAGES',
+        help='benchmark 1 to --shards shards against a local stand-in server',
+    )
+    args = parser.parse_args(argv)
+    if args.scaling:
+        return scaling_benchmark(args.scaling, args.shards)
+    if args.campaign is None:
+        parser.error('the campaign file is required')
+    if args.dry_run:
+        plan = plan_campaign(args.campaign)
+        for index, error in plan.errors:
+            print(f'message {index}: {error}', file=sys.stderr)
+        print(plan.report())
+        return 1 if plan.errors else 0
+    progress = run_campaign(args.campaign, args.shards)
+    for index, error in progress.errors:
+        print(f'message {index}: {error}', file=sys.stderr)
+    if progress.parked:
+        print(
+            f'{progress.parked} messages, or the parts of them not yet delivered, were parked in '
+            f'{progress.parked_path}',
+            file=sys.stderr,
+        )
+    return 1 if progress.failed or progress.parked else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
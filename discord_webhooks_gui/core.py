@@ -1,131 +1,731 @@
-import os
-import re
-from dhooks import Webhook, Embed, File
-import validators
-import requests
-from datetime import datetime
-
-def webhook_pattern(url):
-    pattern = re.compile(r'^https:\/\/discord\.com\/api\/webhooks\/\d+\/[A-Za-z0-9_-]{68}$')
-    return bool(pattern.match(url))
-
-def webhook_validator(text:str):
-    
-    if (validators.url(text) and 
-        # text.startswith("https://discord.com/api/webhooks/") and
-        webhook_pattern(text)):
-        response = requests.get(text)
-        if response.status_code == 200:
-            r_json = response.json()
-            return {
-                'status_code':response.status_code,
-                'avatar': f'https://cdn.discordapp.com/avatars/{r_json["id"]}/{r_json["avatar"]}.png?size=1024',
-                'username': r_json["name"]
-            }
-        return {'status_code':response.status_code}
-    return 'Invalid webhook url'
-
-
-def send(url, avatar, username, content, embeds, file_str):
-    hook = Webhook(url)
-    # print(url, avatar, username, content, embeds, file_str)
-    if len(content) > 0 or len(embeds) > 0 or len(file_str) > 0:
-        if len(file_str) > 0:
-            if (
-                os.path.isfile(file_str)
-                and os.path.getsize(file_str) / (1024 * 1024) <= 8
-            ):
-                file = File(fp=file_str)
-        else:
-            file = None
-        hook.send(
-            content=content,
-            embeds=embeds,
-            avatar_url=avatar,
-            username=username,
-            file=file,
-        )
-    else:
-        raise Exception("There must be a content, a embed or a file at least")
-
-
-def field_dict_creation(name,value,inline):
-    name = name if len(name)> 0 else None
-    value = value if len(value)> 0 else None
-    return {
-        'name':name,
-        'value':value,
-        'inline':inline
-    }
-
-def embed_dict_creation(
-    author,
-    authorUrl,
-    authorIconUrl,
-    title,
-    description,
-    bodyUrl,
-    color,
-    fields,
-    image,
-    thumbnail,
-    footer,
-    timestamp,
-    footerIconUrl,
-):  
-    embed_dict = {}
-    embed_dict["author"] = author
-    embed_dict["authorUrl"] = authorUrl if validators.url(authorUrl) else None 
-    embed_dict["authorIconUrl"] = authorIconUrl if validators.url(authorIconUrl) else None
-    embed_dict["title"] = title
-    embed_dict["description"] = description
-    embed_dict["bodyUrl"] = bodyUrl if validators.url(bodyUrl) else None
-    embed_dict["color"] = int(color[1:], 16) if len(color)>1 else None
-    embed_dict["fields"] = fields
-    embed_dict["image"] = image if os.path.isfile(image) or validators.url(image) else None
-    embed_dict["thumbnail"] = thumbnail if os.path.isfile(thumbnail) or validators.url(thumbnail) else None
-    embed_dict["footer"] = footer
-    embed_dict["timestamp"] = timestamp
-    embed_dict["footerIconUrl"] = footerIconUrl if os.path.isfile(footerIconUrl) or validators.url(footerIconUrl) else None
-    return embed_dict
-
-def embed_creation(embed_dict):
-    embed = Embed(
-        description=embed_dict["description"],
-        color=embed_dict["color"],
-    )
-    # print(embed_dict['timestamp'], type(embed_dict['timestamp']))
-    if embed_dict['timestamp']:
-        embed.set_timestamp(now=embed_dict['timestamp'])
-    embed.set_title(embed_dict["title"], url=embed_dict["bodyUrl"])
-    embed.set_author(
-        name=embed_dict["author"],
-        icon_url=embed_dict["authorIconUrl"],
-        url=embed_dict["authorUrl"],
-    )
-    for field in embed_dict["fields"]:
-        embed.add_field(field["name"], field["value"], inline=field["inline"])
-    embed.set_image(url=embed_dict["image"])
-    embed.set_thumbnail(url=embed_dict["thumbnail"])
-    embed.set_footer(text=f"{embed_dict['footer']}", icon_url = embed_dict["footerIconUrl"])
-
-    return embed
-
-def timestamp_fixer(timestamp):
-    utcnow = datetime.utcnow()
-    now = datetime.fromisoformat(timestamp)
-    if utcnow > now:
-        diff = utcnow - now
-        def_datetime = utcnow - diff
-    elif now > utcnow:
-        diff = now - utcnow 
-        def_datetime = now + diff
-    return def_datetime.isoformat().replace('T', ' ')
-        
-def datetime_valid(dt_str):
-    try:
-        timestamp = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-    except:
-        # raise Exception('Invalid Timestamp ')
-        return [False, None]
-    return [True, timestamp]
+import os
+import re
+import json
+import time
+import copy
+import random
+import asyncio
+import threading
+from dhooks import Embed
+import validators
+import requests
+from datetime import datetime
+from dispatch import Dispatcher
+
+CONTENT_LIMIT = 2000
+EMBEDS_PER_MESSAGE = 10
+EMBED_TOTAL_LIMIT = 6000
+EMBED_PART_LIMITS = {
+    'author': 256,
+    'title': 256,
+    'description': 4096,
+    'footer': 2048,
+}
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+USERNAME_LIMIT = 80
+FILE_SIZE_LIMIT = 8 * 1024 * 1024
+MAX_RETRIES = 5
+# A send that exhausts its retries also opens the breaker, so it fails with
+# its own error instead of an earlier WebhookUnavailable.
+FAILURE_THRESHOLD = MAX_RETRIES + 1
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30
+UNKNOWN_WEBHOOK = 10015
+GLOBAL_RATE_LIMIT = 50
+REQUEST_TIMEOUT = 30
+WEBHOOK_RATE_LIMIT = 5 / 2
+
+def app_data_dir(*parts):
+    path = os.path.join(os.path.expanduser('~'), '.discord_webhooks_gui', *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def load_config():
+    # Settings come from ~/.discord_webhooks_gui/config.json, environment
+    # variables take precedence.
+    config = {
+        'transport': 'requests',
+        'rate_limit': GLOBAL_RATE_LIMIT,
+        'timeout': REQUEST_TIMEOUT,
+    }
+    path = os.path.join(app_data_dir(), 'config.json')
+    if os.path.isfile(path):
+        with open(path, encoding='utf-8') as file:
+            config.update(json.load(file))
+    if os.environ.get('DISCORD_WEBHOOKS_TRANSPORT'):
+        config['transport'] = os.environ['DISCORD_WEBHOOKS_TRANSPORT']
+    return config
+
+class TransportError(Exception):
+    pass
+
+class HTTPStatusError(Exception):
+    pass
+
+class TransportResponse:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers if headers is not None else {}
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.body)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(f'HTTP {self.status_code}: {self.body[:200]!r}')
+
+class Transport:
+    '''
+    Sends requests to Discord over one shared, thread safe client.
+
+    `file` is a (name, binary file or bytes-like) tuple, sent as multipart
+    together with the payload as payload_json. A request that takes longer than `timeout`
+    seconds fails with TransportError.
+    '''
+    name = ''
+
+    def request(self, method, url, payload=None, file=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class RequestsTransport(Transport):
+    name = 'requests'
+
+    def __init__(self, timeout=REQUEST_TIMEOUT):
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def request(self, method, url, payload=None, file=None):
+        try:
+            if file is not None:
+                response = self.session.request(
+                    method, url,
+                    data={'payload_json': json.dumps(payload)},
+                    files={'files[0]': file},
+                    timeout=self.timeout,
+                )
+            else:
+                response = self.session.request(method, url, json=payload, timeout=self.timeout)
+        except (requests.ConnectionError, requests.Timeout) as error:
+            raise TransportError(str(error)) from error
+        return TransportResponse(response.status_code, response.content, response.headers)
+
+    def close(self):
+        self.session.close()
+
+class HttpxTransport(Transport):
+    # HTTP/2 multiplexes concurrent sends over a single connection, it needs
+    # the httpx[http2] extra.
+    name = 'httpx'
+
+    def __init__(self, timeout=REQUEST_TIMEOUT):
+        import httpx
+        self.httpx = httpx
+        self.client = httpx.Client(http2=True, timeout=timeout)
+
+    def request(self, method, url, payload=None, file=None):
+        if file is not None and not isinstance(file[1], bytes) and not hasattr(file[1], 'read'):
+            # httpx only uploads bytes and files, a memoryview is copied.
+            file = (file[0], bytes(file[1]))
+        try:
+            if file is not None:
+                response = self.client.request(
+                    method, url,
+                    data={'payload_json': json.dumps(payload)},
+                    files={'files[0]': file},
+                )
+            else:
+                response = self.client.request(method, url, json=payload)
+        except self.httpx.TransportError as error:
+            raise TransportError(str(error)) from error
+        return TransportResponse(response.status_code, response.content, response.headers)
+
+    def close(self):
+        self.client.close()
+
+class AiohttpTransport(Transport):
+    # The aiohttp session lives on its own event loop thread, callers block
+    # on the result so it fits the synchronous send path.
+    name = 'aiohttp'
+
+    def __init__(self, timeout=REQUEST_TIMEOUT):
+        import aiohttp
+        self.aiohttp = aiohttp
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        self.session = self.run(self.create_session())
+
+    async def create_session(self):
+        return self.aiohttp.ClientSession(timeout=self.aiohttp.ClientTimeout(total=self.timeout))
+
+    def run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def send_request(self, method, url, payload, file):
+        if file is not None:
+            data = self.aiohttp.FormData()
+            data.add_field('payload_json', json.dumps(payload))
+            data.add_field('files[0]', file[1], filename=file[0])
+            request = self.session.request(method, url, data=data)
+        else:
+            request = self.session.request(method, url, json=payload)
+        async with request as response:
+            return TransportResponse(response.status, await response.read(), response.headers)
+
+    def request(self, method, url, payload=None, file=None):
+        try:
+            return self.run(self.send_request(method, url, payload, file))
+        except (self.aiohttp.ClientError, asyncio.TimeoutError) as error:
+            raise TransportError(str(error)) from error
+
+    def close(self):
+        self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+TRANSPORTS = {
+    transport.name: transport
+    for transport in (RequestsTransport, HttpxTransport, AiohttpTransport)
+}
+
+_transport = None
+_transport_lock = threading.Lock()
+
+def get_transport():
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            config = load_config()
+            _transport = TRANSPORTS[config['transport']](config['timeout'])
+        return _transport
+
+def set_transport(transport):
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = transport
+
+_dispatcher = None
+
+def get_dispatcher():
+    global _dispatcher
+    with _transport_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher(load_config()['rate_limit'])
+        return _dispatcher
+
+def set_dispatcher(dispatcher):
+    global _dispatcher
+    with _transport_lock:
+        _dispatcher = dispatcher
+
+def webhook_pattern(url):
+    pattern = re.compile(r'^https:\/\/discord\.com\/api\/webhooks\/\d+\/[A-Za-z0-9_-]{68}$')
+    return bool(pattern.match(url))
+
+def webhook_id(url):
+    match = re.search(r'/webhooks/(\d+)/', url)
+    return int(match.group(1)) if match else None
+
+class WebhookUnavailable(Exception):
+    pass
+
+class PartialSendError(Exception):
+    '''
+    Raised by send when a part of a message fails after earlier parts were
+    delivered. `sent` holds the records of the delivered parts, `unsent` the
+    parts (content and embeds) still to send and `error` the failure.
+    '''
+    def __init__(self, sent, unsent, error):
+        super().__init__(
+            f'{len(sent)} of {len(sent) + len(unsent)} parts were sent, then: {error}'
+        )
+        self.sent = sent
+        self.unsent = unsent
+        self.error = error
+
+class CircuitBreaker:
+    '''
+    Health of a single webhook.
+
+    A permanent failure (revoked token, deleted webhook) opens the breaker
+    until the webhook is validated again. Repeated transient failures open it
+    for `cooldown` seconds, after which a single request may probe it.
+    '''
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, cooldown=60):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.state = 'closed'
+        self.failures = 0
+        self.permanent = False
+        self.opened_at = 0
+        self.reason = ''
+
+    def allow(self):
+        with self.lock:
+            if (self.state == 'open' and not self.permanent and
+                    time.monotonic() - self.opened_at >= self.cooldown):
+                self.state = 'half-open'
+            return self.state != 'open'
+
+    def is_open(self):
+        # Read only, unlike allow: an open breaker past its cooldown counts
+        # as closed, the next request is the probe.
+        with self.lock:
+            return self.state == 'open' and (
+                self.permanent or time.monotonic() - self.opened_at < self.cooldown
+            )
+
+    def cooldown_left(self):
+        with self.lock:
+            if self.state != 'open' or self.permanent:
+                return 0
+            return max(0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def success(self):
+        with self.lock:
+            self.reset()
+
+    def failure(self, reason, permanent=False):
+        with self.lock:
+            self.failures += 1
+            self.reason = reason
+            if (permanent or self.state == 'half-open' or
+                    self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.permanent = permanent
+                self.opened_at = time.monotonic()
+
+    def describe(self):
+        if self.is_open():
+            return f'Unavailable: {self.reason}'
+        if self.failures:
+            return f'Retrying ({self.failures} failures): {self.reason}'
+        return ''
+
+breakers = {}
+breakers_lock = threading.Lock()
+
+def circuit_breaker(url):
+    key = webhook_id(url) or url
+    with breakers_lock:
+        if key not in breakers:
+            breakers[key] = CircuitBreaker()
+        return breakers[key]
+
+def backoff_delay(attempt):
+    # Full jitter, so retries from many senders don't line up.
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+def retry_after(response, attempt):
+    # Discord gives the wait in the body, proxies and Cloudflare only send
+    # the header or nothing at all.
+    try:
+        return float(response.json()['retry_after'])
+    except (ValueError, KeyError, TypeError):
+        pass
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (ValueError, TypeError):
+        return backoff_delay(attempt)
+
+def permanent_failure(response):
+    if response.status_code in (401, 403):
+        return True
+    if response.status_code == 404:
+        try:
+            return response.json().get('code', UNKNOWN_WEBHOOK) == UNKNOWN_WEBHOOK
+        except ValueError:
+            return True
+    return False
+
+def webhook_validator(text:str):
+    
+    if (validators.url(text) and 
+        # text.startswith("https://discord.com/api/webhooks/") and
+        webhook_pattern(text)):
+        response = get_transport().request('GET', text)
+        if permanent_failure(response):
+            circuit_breaker(text).failure(f'HTTP {response.status_code}', permanent=True)
+        if response.status_code == 200:
+            circuit_breaker(text).success()
+            r_json = response.json()
+            return {
+                'status_code':response.status_code,
+                'avatar': f'https://cdn.discordapp.com/avatars/{r_json["id"]}/{r_json["avatar"]}.png?size=1024',
+                'username': r_json["name"]
+            }
+        return {'status_code':response.status_code}
+    return 'Invalid webhook url'
+
+
+def split_content(content, limit=CONTENT_LIMIT):
+    # Cuts on the last line break before the limit, then on the last space,
+    # and only splits inside a word when there is no other choice.
+    chunks = []
+    while len(content) > limit:
+        cut = content.rfind('\n', 0, limit + 1)
+        if cut <= 0:
+            cut = content.rfind(' ', 0, limit + 1)
+        if cut <= 0:
+            chunks.append(content[:limit])
+            content = content[limit:]
+        else:
+            chunks.append(content[:cut])
+            content = content[cut + 1:]
+    chunks.append(content)
+    return [chunk for chunk in chunks if chunk.strip()]
+
+def text_length(text):
+    return len(text) if text else 0
+
+def embed_parts(embed):
+    return {
+        'author': embed.author['name'] if embed.author else None,
+        'title': embed.title,
+        'description': embed.description,
+        'footer': embed.footer['text'] if embed.footer else None,
+    }
+
+def field_length(field):
+    return text_length(field['name']) + text_length(field['value'])
+
+def embed_length(embed):
+    return (
+        sum(text_length(text) for text in embed_parts(embed).values())
+        + sum(field_length(field) for field in embed.fields)
+    )
+
+def limit_errors(part_lengths, fields, length):
+    errors = [
+        f'{part.capitalize()} exceeds {limit} characters'
+        for part, limit in EMBED_PART_LIMITS.items()
+        if part_lengths[part] > limit
+    ]
+    for field in fields:
+        if text_length(field['name']) > FIELD_NAME_LIMIT:
+            errors.append(f'Field name exceeds {FIELD_NAME_LIMIT} characters')
+        if text_length(field['value']) > FIELD_VALUE_LIMIT:
+            errors.append(f'Field value exceeds {FIELD_VALUE_LIMIT} characters')
+    if length > EMBED_TOTAL_LIMIT:
+        errors.append(f'Embed exceeds {EMBED_TOTAL_LIMIT} characters')
+    return errors
+
+def embed_limit_errors(embed):
+    part_lengths = {
+        part: text_length(text) for part, text in embed_parts(embed).items()
+    }
+    return limit_errors(part_lengths, embed.fields, embed_length(embed))
+
+def chunk_embeds(embeds):
+    chunks = []
+    current = []
+    current_length = 0
+    for embed in embeds:
+        length = embed_length(embed)
+        if current and (len(current) >= EMBEDS_PER_MESSAGE or
+                        current_length + length > EMBED_TOTAL_LIMIT):
+            chunks.append(current)
+            current = []
+            current_length = 0
+        current.append(embed)
+        current_length += length
+    if current:
+        chunks.append(current)
+    return chunks
+
+def message_parts(content, embeds):
+    parts = [{'content': chunk, 'embeds': []} for chunk in split_content(content)]
+    for index, chunk in enumerate(chunk_embeds(embeds)):
+        if index == 0 and parts:
+            parts[-1]['embeds'] = chunk
+        else:
+            parts.append({'content': '', 'embeds': chunk})
+    return parts or [{'content': '', 'embeds': []}]
+
+def check_message(username, content, embeds, file_str, attachment=None):
+    if not (len(content) > 0 or len(embeds) > 0 or len(file_str) > 0 or attachment):
+        raise Exception("There must be a content, a embed or a file at least")
+    if len(username) > USERNAME_LIMIT:
+        raise Exception(f"Username exceeds {USERNAME_LIMIT} characters")
+    for index, embed in enumerate(embeds):
+        errors = embed_limit_errors(embed)
+        if errors:
+            raise Exception(f"Embed {index+1}: {', '.join(errors)}")
+    if len(file_str) > 0:
+        if not os.path.isfile(file_str):
+            raise Exception(f"{file_str} is not a file")
+        if os.path.getsize(file_str) > FILE_SIZE_LIMIT:
+            raise Exception(
+                f"The file exceeds {FILE_SIZE_LIMIT // (1024 * 1024)} MB"
+            )
+    if attachment and len(attachment[1]) > FILE_SIZE_LIMIT:
+        raise Exception(
+            f"The file exceeds {FILE_SIZE_LIMIT // (1024 * 1024)} MB"
+        )
+
+def send(url, avatar, username, content, embeds, file_str, lane='bulk', attachment=None):
+    # print(url, avatar, username, content, embeds, file_str)
+    # attachment is a (name, bytes or memoryview) pair held in memory, sent
+    # instead of file_str.
+    check_message(username, content, embeds, file_str, attachment)
+    # Every part is built and checked before the first request goes out,
+    # so each follow-up is ready as soon as the previous one is acknowledged.
+    parts = message_parts(content, embeds)
+    if attachment:
+        # Handed to the transport as it is, the multipart encoding still
+        # copies it once into the request body.
+        file = attachment
+    elif len(file_str) > 0:
+        file = open(file_str, 'rb')
+    else:
+        file = None
+    # The shared transport keeps its connections open between parts,
+    # which are sent strictly in order. The file goes with the last one.
+    transport = get_transport()
+    sent = []
+    try:
+        for index, part in enumerate(parts):
+            payload = message_payload(part['content'], part['embeds'], username, avatar)
+            try:
+                message = webhook_request(
+                    transport, 'POST', url, payload,
+                    file if index == len(parts) - 1 else None, lane,
+                )
+            except Exception as error:
+                if not sent:
+                    raise
+                # The delivered parts must not be sent again, only the rest.
+                raise PartialSendError(sent, parts[index:], error) from error
+            sent.append({
+                'id': message['id'],
+                'webhook': url,
+                'payload': copy.deepcopy(payload),
+                'embeds': list(part['embeds']),
+            })
+    finally:
+        if file is not None and file is not attachment:
+            file.close()
+    return sent
+
+def plan_message(avatar, username, content, embeds, file_str, attachment=None):
+    # What send would put on the wire for this message, without sending it.
+    check_message(username, content, embeds, file_str, attachment)
+    payloads = [
+        message_payload(part['content'], part['embeds'], username, avatar)
+        for part in message_parts(content, embeds)
+    ]
+    return {
+        'requests': len(payloads),
+        'bytes': sum(len(json.dumps(payload).encode()) for payload in payloads),
+        'attachment_bytes': (
+            len(attachment[1]) if attachment else
+            os.path.getsize(file_str) if len(file_str) > 0 else 0
+        ),
+    }
+
+def message_payload(content, embeds, username='', avatar=''):
+    payload = {
+        'content': content,
+        'embeds': [embed.to_dict() for embed in embeds],
+    }
+    if username:
+        payload['username'] = username
+    if avatar:
+        payload['avatar_url'] = avatar
+    return payload
+
+def webhook_request(transport, method, url, payload, file=None, lane='bulk'):
+    # wait=true makes Discord answer with the created message, so its id is known.
+    breaker = circuit_breaker(url)
+    dispatcher = get_dispatcher()
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise WebhookUnavailable(
+                f'Webhook {webhook_id(url)} is unavailable: {breaker.reason}'
+            )
+        # Every attempt, retries included, waits for a slot in its lane.
+        dispatcher.acquire(lane)
+        try:
+            response = transport.request(method, with_wait(url), payload, upload(file))
+        except TransportError:
+            breaker.failure('Connection error')
+            if attempt >= MAX_RETRIES:
+                raise
+        else:
+            if response.status_code == 429:
+                if attempt >= MAX_RETRIES:
+                    response.raise_for_status()
+                attempt += 1
+                time.sleep(retry_after(response, attempt))
+                continue
+            if response.ok:
+                breaker.success()
+                return response.json()
+            if permanent_failure(response):
+                breaker.failure(f'HTTP {response.status_code}', permanent=True)
+                raise WebhookUnavailable(
+                    f'Webhook {webhook_id(url)} is unavailable: HTTP {response.status_code}'
+                )
+            if response.status_code < 500:
+                response.raise_for_status()
+            breaker.failure(f'HTTP {response.status_code}')
+            if attempt >= MAX_RETRIES:
+                response.raise_for_status()
+        attempt += 1
+        time.sleep(backoff_delay(attempt))
+
+def upload(file):
+    # Open files are rewound for every attempt, in-memory attachments come
+    # as a (name, data) pair already.
+    if file is None or isinstance(file, tuple):
+        return file
+    file.seek(0)
+    return (os.path.basename(file.name), file)
+
+def with_wait(url):
+    return url + ('&' if '?' in url else '?') + 'wait=true'
+
+def message_diff(previous, current):
+    return {key: value for key, value in current.items() if previous.get(key) != value}
+
+def edit_message(record, content=None, lane='bulk'):
+    # Only the keys that changed since the last send are patched: the embeds,
+    # and the content when a new one is given. Attachments are left out of
+    # the request, so Discord keeps the ones already uploaded.
+    current = {'embeds': [embed.to_dict() for embed in record['embeds']]}
+    if content is not None:
+        if len(content) > CONTENT_LIMIT:
+            raise Exception(f"The content exceeds {CONTENT_LIMIT} characters")
+        current['content'] = content
+    changes = message_diff(record['payload'], current)
+    if changes:
+        webhook_request(
+            get_transport(), 'PATCH', f"{record['webhook']}/messages/{record['id']}", changes,
+            lane=lane,
+        )
+        record['payload'].update(copy.deepcopy(changes))
+    return changes
+
+
+def field_dict_creation(name,value,inline):
+    name = name if len(name)> 0 else None
+    value = value if len(value)> 0 else None
+    return {
+        'name':name,
+        'value':value,
+        'inline':inline
+    }
+
+def embed_dict_creation(
+    author,
+    authorUrl,
+    authorIconUrl,
+    title,
+    description,
+    bodyUrl,
+    color,
+    fields,
+    image,
+    thumbnail,
+    footer,
+    timestamp,
+    footerIconUrl,
+):  
+    embed_dict = {}
+    embed_dict["author"] = author
+    embed_dict["authorUrl"] = authorUrl if validators.url(authorUrl) else None 
+    embed_dict["authorIconUrl"] = authorIconUrl if validators.url(authorIconUrl) else None
+    embed_dict["title"] = title
+    embed_dict["description"] = description
+    embed_dict["bodyUrl"] = bodyUrl if validators.url(bodyUrl) else None
+    embed_dict["color"] = int(color[1:], 16) if len(color)>1 else None
+    embed_dict["fields"] = fields
+    embed_dict["image"] = image if os.path.isfile(image) or validators.url(image) else None
+    embed_dict["thumbnail"] = thumbnail if os.path.isfile(thumbnail) or validators.url(thumbnail) else None
+    embed_dict["footer"] = footer
+    embed_dict["timestamp"] = timestamp
+    embed_dict["footerIconUrl"] = footerIconUrl if os.path.isfile(footerIconUrl) or validators.url(footerIconUrl) else None
+    return embed_dict
+
+def embed_dict_from_payload(payload):
+    # Maps an embed in Discord's JSON shape onto the dict embed_creation expects.
+    author = payload.get('author') or {}
+    footer = payload.get('footer') or {}
+    return {
+        'author': author.get('name'),
+        'authorUrl': author.get('url'),
+        'authorIconUrl': author.get('icon_url'),
+        'title': payload.get('title'),
+        'description': payload.get('description'),
+        'bodyUrl': payload.get('url'),
+        'color': payload.get('color'),
+        'fields': [
+            field_dict_creation(
+                field.get('name', ''), field.get('value', ''), field.get('inline', False)
+            )
+            for field in payload.get('fields', [])
+        ],
+        'image': (payload.get('image') or {}).get('url'),
+        'thumbnail': (payload.get('thumbnail') or {}).get('url'),
+        'footer': footer.get('text', ''),
+        'timestamp': payload.get('timestamp'),
+        'footerIconUrl': footer.get('icon_url'),
+    }
+
+def embed_creation(embed_dict):
+    embed = Embed(
+        description=embed_dict["description"],
+        color=embed_dict["color"],
+    )
+    # print(embed_dict['timestamp'], type(embed_dict['timestamp']))
+    if embed_dict['timestamp'] is True:
+        embed.set_timestamp(now=True)
+    elif embed_dict['timestamp']:
+        embed.set_timestamp(time=embed_dict['timestamp'])
+    embed.set_title(embed_dict["title"], url=embed_dict["bodyUrl"])
+    embed.set_author(
+        name=embed_dict["author"],
+        icon_url=embed_dict["authorIconUrl"],
+        url=embed_dict["authorUrl"],
+    )
+    for field in embed_dict["fields"]:
+        embed.add_field(field["name"], field["value"], inline=field["inline"])
+    embed.set_image(url=embed_dict["image"])
+    embed.set_thumbnail(url=embed_dict["thumbnail"])
+    embed.set_footer(text=f"{embed_dict['footer']}", icon_url = embed_dict["footerIconUrl"])
+
+    return embed
+
+def timestamp_fixer(timestamp):
+    utcnow = datetime.utcnow()
+    now = datetime.fromisoformat(timestamp)
+    if utcnow > now:
+        diff = utcnow - now
+        def_datetime = utcnow - diff
+    elif now > utcnow:
+        diff = now - utcnow 
+        def_datetime = now + diff
+    return def_datetime.isoformat().replace('T', ' ')
+        
+def datetime_valid(dt_str):
+    try:
+        timestamp = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+    except:
+        # raise Exception('Invalid Timestamp ')
+        return [False, None]
+    return [True, timestamp]
@@ -0,0 +1,90 @@
+import time
+import threading
+from collections import deque
+
+LANE_WEIGHTS = {
+    'interactive': 8,
+    'alert': 4,
+    'bulk': 1,
+}
+LANES = tuple(LANE_WEIGHTS)
+
+class Ticket:
+    def __init__(self):
+        self.queued = time.monotonic()
+
+class Dispatcher:
+    '''
+    Hands out request slots from a token bucket refilled at `rate` requests
+    per second (None for no limit).
+
+    Requests waiting for a slot queue in their lane, and the lanes are served
+    by smooth weighted round robin: with interactive, alert and bulk traffic
+    all waiting, bulk still gets one slot in every 13.
+    '''
+    def __init__(self, rate=None, weights=LANE_WEIGHTS):
+        self.rate = rate
+        self.weights = dict(weights)
+        self.tokens = rate or 0
+        self.updated = time.monotonic()
+        self.condition = threading.Condition()
+        self.queues = {lane: deque() for lane in self.weights}
+        self.credit = dict.fromkeys(self.weights, 0)
+        self.granted = dict.fromkeys(self.weights, 0)
+        self.total_wait = dict.fromkeys(self.weights, 0.0)
+        self.max_wait = dict.fromkeys(self.weights, 0.0)
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def next_lane(self):
+        waiting = [lane for lane in self.queues if self.queues[lane]]
+        if not waiting:
+            return None
+        return max(waiting, key=lambda lane: self.credit[lane] + self.weights[lane])
+
+    def acquire(self, lane):
+        if lane not in self.queues:
+            raise ValueError(f'Unknown lane {lane}, expected one of {", ".join(self.queues)}')
+        ticket = Ticket()
+        with self.condition:
+            self.queues[lane].append(ticket)
+            while True:
+                if self.next_lane() == lane and self.queues[lane][0] is ticket:
+                    if self.rate is None:
+                        break
+                    self.refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        break
+                    self.condition.wait((1 - self.tokens) / self.rate)
+                else:
+                    self.condition.wait()
+            self.grant(lane)
+
+    def grant(self, lane):
+        waiting = [name for name in self.queues if self.queues[name]]
+        for name in waiting:
+            self.credit[name] += self.weights[name]
+        self.credit[lane] -= sum(self.weights[name] for name in waiting)
+        wait = time.monotonic() - self.queues[lane].popleft().queued
+        if not self.queues[lane]:
+            self.credit[lane] = 0  # an idle lane neither saves up nor owes slots
+        self.granted[lane] += 1
+        self.total_wait[lane] += wait
+        self.max_wait[lane] = max(self.max_wait[lane], wait)
+        self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            return {
+                lane: {
+                    'depth': len(self.queues[lane]),
+                    'granted': self.granted[lane],
+                    'mean_wait': self.total_wait[lane] / self.granted[lane] if self.granted[lane] else 0.0,
+                    'max_wait': self.max_wait[lane],
+                }
+                for lane in self.queues
+            }
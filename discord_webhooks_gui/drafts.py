@@ -0,0 +1,69 @@
+import os
+import json
+from core import app_data_dir
+
+class DraftJournal:
+    '''
+    Draft storage made of a snapshot plus a journal of changes.
+
+    Each save appends only the keys that changed since the previous one, and
+    the journal is folded into a new snapshot every `compact_every` entries.
+    '''
+    def __init__(self, path=None, compact_every=200):
+        path = path or os.path.join(app_data_dir(), 'draft')
+        self.snapshot_path = path + '.json'
+        self.journal_path = path + '.journal'
+        self.compact_every = compact_every
+        self.state = {}
+        self.entries = 0
+
+    def load(self):
+        state = {}
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as file:
+                state = json.load(file)
+        entries = 0
+        torn = False
+        if os.path.isfile(self.journal_path):
+            with open(self.journal_path, encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        state.update(json.loads(line))
+                    except ValueError:
+                        torn = True  # the last write was cut short by a crash
+                        break
+                    entries += 1
+        self.state = state
+        self.entries = entries
+        if torn:
+            self.compact()
+        return json.loads(json.dumps(state))
+
+    def save(self, state):
+        changes = {
+            key: value for key, value in state.items()
+            if key not in self.state or self.state[key] != value
+        }
+        if not changes:
+            return
+        line = json.dumps(changes)
+        with open(self.journal_path, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+        # Stored as decoded copies, so later edits to the caller's lists and
+        # dicts still show up as changes.
+        self.state.update(json.loads(line))
+        self.entries += 1
+        if self.entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        # The snapshot is replaced atomically before the journal is emptied.
+        # A crash in between only replays changes the snapshot already has.
+        temporary = self.snapshot_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(self.state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.snapshot_path)
+        open(self.journal_path, 'w').close()
+        self.entries = 0
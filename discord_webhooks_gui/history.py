@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from core import app_data_dir
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    message_id TEXT,
+    webhook TEXT NOT NULL,
+    sent_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    content TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_webhook ON messages (webhook, id);
+CREATE INDEX IF NOT EXISTS messages_sent_at ON messages (sent_at);
+CREATE INDEX IF NOT EXISTS messages_status ON messages (status, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, titles, descriptions, field_values, content=''
+);
+'''
+
+def fts_query(text):
+    # Every word is quoted so user input can't break the FTS syntax, and
+    # matched as a prefix so results show up while typing.
+    return ' '.join(
+        '"' + word.replace('"', '""') + '"*' for word in text.split()
+    )
+
+class History:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), 'history.sqlite3')
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def record(self, webhook, payload, status, message_id=None):
+        embeds = payload.get('embeds', [])
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                'INSERT INTO messages (message_id, webhook, sent_at, status, content, payload) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (message_id, webhook, time.time(), status,
+                 payload.get('content', ''), json.dumps(payload)),
+            )
+            self.connection.execute(
+                'INSERT INTO messages_fts (rowid, content, titles, descriptions, field_values) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (
+                    cursor.lastrowid,
+                    payload.get('content', ''),
+                    '\n'.join(embed.get('title') or '' for embed in embeds),
+                    '\n'.join(embed.get('description') or '' for embed in embeds),
+                    '\n'.join(
+                        field.get('value') or ''
+                        for embed in embeds for field in embed.get('fields', [])
+                    ),
+                ),
+            )
+
+    def record_sent(self, sent):
+        for record in sent:
+            self.record(record['webhook'], record['payload'], 'sent', record['id'])
+
+    def page(self, before=None, limit=200, query=''):
+        # Keyset pagination on the primary key, newest first, so any page
+        # costs the same however deep into the history it is.
+        before = before if before is not None else 2 ** 63 - 1
+        with self.lock:
+            if query.strip():
+                return self.connection.execute(
+                    'SELECT m.id, m.message_id, m.webhook, m.sent_at, m.status, m.content '
+                    'FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid '
+                    'WHERE messages_fts MATCH ? AND messages_fts.rowid < ? '
+                    'ORDER BY messages_fts.rowid DESC LIMIT ?',
+                    (fts_query(query), before, limit),
+                ).fetchall()
+            return self.connection.execute(
+                'SELECT id, message_id, webhook, sent_at, status, content '
+                'FROM messages WHERE id < ? ORDER BY id DESC LIMIT ?',
+                (before, limit),
+            ).fetchall()
+
+    def payload(self, id):
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT payload FROM messages WHERE id = ?', (id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import socket
+import getpass
+import argparse
+
+# Imported before Qt on every launch, so this module stays on the standard library.
+
+def server_name():
+    if sys.platform == 'win32':
+        # QLocalServer serves a plain name as the pipe \\.\pipe\<name>.
+        return f'discord_webhooks_gui-{getpass.getuser()}'
+    return os.path.join(os.path.expanduser('~'), '.discord_webhooks_gui', 'instance.sock')
+
+def launch_request(argv):
+    parser = argparse.ArgumentParser(description='Send messages to Discord webhooks')
+    parser.add_argument('--file', help='file to attach')
+    parser.add_argument('--message', help='JSON message or embeds to load')
+    args, _ = parser.parse_known_args(argv)
+    return {
+        'file': os.path.abspath(args.file) if args.file else None,
+        'message': os.path.abspath(args.message) if args.message else None,
+    }
+
+def forward_to_running(request, timeout=2):
+    data = json.dumps(request).encode() + b'\n'
+    try:
+        if sys.platform == 'win32':
+            with open('\\\\.\\pipe\\' + server_name(), 'r+b', buffering=0) as pipe:
+                pipe.write(data)
+                return pipe.readline() == b'ok\n'
+        with socket.socket(socket.AF_UNIX) as client:
+            client.settimeout(timeout)
+            client.connect(server_name())
+            client.sendall(data)
+            return client.makefile('rb').readline() == b'ok\n'
+    except OSError:
+        return False  # nothing is listening, this launch becomes the instance
+
+def stale_server(timeout=2):
+    # The socket of an instance that crashed refuses connections. A live
+    # instance accepts, or keeps a busy client waiting, and must be left alone.
+    if sys.platform == 'win32':
+        return False  # a pipe goes away with its process
+    with socket.socket(socket.AF_UNIX) as client:
+        client.settimeout(timeout)
+        try:
+            client.connect(server_name())
+        except (ConnectionRefusedError, FileNotFoundError):
+            return True
+        except OSError:
+            return False
+    return False
@@ -0,0 +1,172 @@
+import os
+import re
+import sys
+import signal
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QCoreApplication, QFileSystemWatcher, QObject, QTimer
+from core import (
+    send,
+    embed_creation,
+    embed_dict_creation,
+    field_dict_creation,
+    field_length,
+    EMBED_TOTAL_LIMIT,
+    FIELD_VALUE_LIMIT,
+)
+
+FIELDS_PER_EMBED = 25
+
+class TailedFile:
+    '''
+    Reads the lines appended to a file since the last read, following it
+    through rotation (a new file at the same path) and truncation.
+    '''
+    def __init__(self, path, from_start=False):
+        self.path = path
+        self.file = None
+        self.identity = None
+        self.partial = b''
+        self.open(from_start)
+
+    def open(self, from_start):
+        if not os.path.isfile(self.path):
+            return
+        self.file = open(self.path, 'rb')
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_dev, stat.st_ino)
+        if not from_start:
+            self.file.seek(0, os.SEEK_END)
+
+    def read_lines(self):
+        lines = self.drain()
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return lines  # rotated away, wait for the new file to appear
+        if (stat.st_dev, stat.st_ino) != self.identity:
+            # The old file was drained above, the new one is read from its start.
+            if self.file is not None:
+                self.file.close()
+            self.partial = b''
+            self.open(from_start=True)
+            lines += self.drain()
+        elif stat.st_size < self.file.tell():
+            self.file.seek(0)
+            self.partial = b''
+            lines += self.drain()
+        return lines
+
+    def drain(self):
+        if self.file is None:
+            return []
+        data = self.partial + self.file.read()
+        *lines, self.partial = data.split(b'\n')
+        return [line.decode('utf-8', errors='replace').rstrip('\r') for line in lines]
+
+def pack_fields(name, lines):
+    # Embeds of at most 25 fields and 6000 characters, one field per line.
+    embeds = []
+    fields = []
+    length = 0
+    for line in lines:
+        field = field_dict_creation(name, line[:FIELD_VALUE_LIMIT] or '-', False)
+        if fields and (len(fields) >= FIELDS_PER_EMBED or
+                       length + field_length(field) > EMBED_TOTAL_LIMIT):
+            embeds.append(fields)
+            fields = []
+            length = 0
+        fields.append(field)
+        length += field_length(field)
+    if fields:
+        embeds.append(fields)
+    return [
+        embed_creation(embed_dict_creation(
+            '', '', '', '', '', '', '', fields, '', '', '', True, ''
+        ))
+        for fields in embeds
+    ]
+
+class LogTail(QObject):
+    def __init__(self, webhook, paths, pattern, interval, as_fields=False, from_start=False):
+        super().__init__()
+        self.webhook = webhook
+        self.pattern = re.compile(pattern)
+        self.as_fields = as_fields
+        self.files = {os.path.abspath(path): TailedFile(os.path.abspath(path), from_start) for path in paths}
+        self.batch = {}
+        # Sends leave the event loop on a single thread, batches keep their order.
+        self.sender = ThreadPoolExecutor(max_workers=1)
+        self.flushTimer = QTimer(self)
+        self.flushTimer.setSingleShot(True)
+        self.flushTimer.setInterval(int(interval * 1000))
+        self.flushTimer.timeout.connect(self.flush)
+        # Changes are pushed by the OS (inotify, kqueue or ReadDirectoryChangesW),
+        # so nothing runs while the files are idle.
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPaths(list(self.files) + list({os.path.dirname(path) for path in self.files}))
+        self.watcher.fileChanged.connect(self.file_changed)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        if from_start:
+            for path in self.files:
+                self.file_changed(path)
+
+    def file_changed(self, path):
+        tailed = self.files[path]
+        matches = [line for line in tailed.read_lines() if self.pattern.search(line)]
+        if os.path.isfile(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        if matches:
+            self.batch.setdefault(path, []).extend(matches)
+            if not self.flushTimer.isActive():
+                self.flushTimer.start()
+
+    def directory_changed(self, directory):
+        # A rotated log shows up as a new file at a watched path.
+        for path in self.files:
+            if os.path.dirname(path) == directory and os.path.isfile(path):
+                self.file_changed(path)
+
+    def flush(self):
+        batch, self.batch = self.batch, {}
+        for path, lines in batch.items():
+            if self.as_fields:
+                content, embeds = '', pack_fields(os.path.basename(path), lines)
+            else:
+                content, embeds = '\n'.join(lines), []
+            self.sender.submit(self.send, content, embeds)
+
+    def send(self, content, embeds):
+        try:
+            send(self.webhook, '', '', content, embeds, '', 'alert')
+        except Exception:
+            traceback.print_exc()
+
+    def close(self):
+        self.flushTimer.stop()
+        self.flush()
+        self.sender.shutdown(wait=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Post matching log lines to a Discord webhook')
+    parser.add_argument('webhook')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--pattern', default='ERROR|CRITICAL|Traceback', help='regex lines must match')
+    parser.add_argument('--interval', type=float, default=5.0, help='seconds to batch lines for')
+    parser.add_argument('--fields', action='store_true', help='post lines as embed fields')
+    parser.add_argument('--from-start', action='store_true', help='read the files from the beginning')
+    args = parser.parse_args(argv)
+    app = QCoreApplication(sys.argv[:1])
+    tail = LogTail(args.webhook, args.files, args.pattern, args.interval, args.fields, args.from_start)
+    signal.signal(signal.SIGINT, lambda *args: app.quit())
+    # Python only handles signals between bytecodes, wake it now and then.
+    wakeup = QTimer()
+    wakeup.start(500)
+    wakeup.timeout.connect(lambda: None)
+    app.exec()
+    tail.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import json
+from itertools import islice
+from core import (
+    embed_creation,
+    embed_dict_from_payload,
+    embed_limit_errors,
+    message_payload,
+    message_parts,
+)
+
+WHITESPACE = ' \t\r\n'
+NUMBER_CHARS = '0123456789+-.eE'
+
+class JsonStream:
+    '''
+    Reads JSON from a file a chunk at a time, one value at a time.
+
+    Containers can be walked with `iter_array` and `iter_object`, so a large
+    list of messages or embeds never has to be held in memory at once.
+    '''
+    def __init__(self, file, chunk_size=64 * 1024):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.position = 0
+        self.decoder = json.JSONDecoder()
+
+    def fill(self):
+        chunk = self.file.read(self.chunk_size)
+        if chunk:
+            self.buffer = self.buffer[self.position:] + chunk
+            self.position = 0
+        return bool(chunk)
+
+    def peek(self):
+        while True:
+            while (self.position < len(self.buffer) and
+                   self.buffer[self.position] in WHITESPACE):
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                return ''
+
+    def take(self, char):
+        if self.peek() != char:
+            raise ValueError(f'Expected {char!r} but found {self.peek()!r}')
+        self.position += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number cut by the end of the chunk decodes as a shorter one,
+            # so it is read again once something follows it.
+            if (isinstance(value, (int, float)) and
+                    (end == len(self.buffer) or self.buffer[end] in NUMBER_CHARS) and
+                    self.fill()):
+                continue
+            self.position = end
+            return value
+
+    def iter_array(self):
+        self.take('[')
+        if self.peek() == ']':
+            self.position += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            self.take(']')
+            return
+
+    def iter_object(self):
+        # Yields each key, the caller reads its value before asking for the next.
+        self.take('{')
+        if self.peek() == '}':
+            self.position += 1
+            return
+        while True:
+            key = self.value()
+            self.take(':')
+            yield key
+            if self.peek() == ',':
+                self.position += 1
+                continue
+            self.take('}')
+            return
+
+def message_from_item(item):
+    # Discohook wraps each message in {"data": ...}, bare embeds become
+    # messages holding just that embed.
+    if not isinstance(item, dict):
+        return {'content': '', 'embeds': [item]}
+    if isinstance(item.get('data'), dict):
+        item = item['data']
+    if any(key in item for key in ('content', 'embeds', 'username', 'avatar_url')):
+        return item
+    return {'content': '', 'embeds': [item]}
+
+def iter_messages(file):
+    '''
+    Yields messages from a Discord webhook payload, a list of payloads or
+    embeds, a Discohook export, or JSON lines of any of those.
+    '''
+    stream = JsonStream(file)
+    while stream.peek():
+        if stream.peek() == '[':
+            for item in stream.iter_array():
+                yield message_from_item(item)
+            continue
+        message = {}
+        streamed = False
+        for key in stream.iter_object():
+            if key == 'messages' and stream.peek() == '[':
+                streamed = True
+                for item in stream.iter_array():
+                    yield message_from_item(item)
+            elif key == 'embeds' and stream.peek() == '[':
+                streamed = True
+                for item in stream.iter_array():
+                    yield {'content': '', 'embeds': [item]}
+            else:
+                message[key] = stream.value()
+        if message.get('content') or 'data' in message:
+            yield message_from_item(message)
+        elif message and not streamed and 'content' not in message:
+            yield message_from_item(message)  # a bare embed
+
+def import_messages(path, batch_size=100):
+    contents = []
+    embeds = []
+    errors = []
+    with open(path, encoding='utf-8') as file:
+        messages = iter_messages(file)
+        while True:
+            batch = list(islice(messages, batch_size))
+            if not batch:
+                break
+            for message in batch:
+                if message.get('content'):
+                    contents.append(message['content'])
+                for payload in message.get('embeds') or []:
+                    number = len(embeds) + len(errors) + 1
+                    try:
+                        embed = embed_creation(embed_dict_from_payload(payload))
+                    except (AttributeError, TypeError, ValueError) as error:
+                        errors.append(f'Embed {number}: {error}')
+                        continue
+                    embed_errors = embed_limit_errors(embed)
+                    if embed_errors:
+                        errors.append(f"Embed {number}: {', '.join(embed_errors)}")
+                    else:
+                        embeds.append(embed)
+    return '\n'.join(contents), embeds, errors
+
+def export_messages(path, content, embeds, username='', avatar=''):
+    # Written as a Discohook style export, one message per part, so each
+    # entry is a payload Discord accepts as is.
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('{"messages": [')
+        for index, part in enumerate(message_parts(content, embeds)):
+            if index:
+                file.write(', ')
+            json.dump(
+                {'data': message_payload(part['content'], part['embeds'], username, avatar)},
+                file,
+            )
+        file.write(']}\n')
@@ -0,0 +1,67 @@
+from collections import Counter
+from core import (
+    plan_message,
+    webhook_id,
+    GLOBAL_RATE_LIMIT,
+    WEBHOOK_RATE_LIMIT,
+)
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+def format_duration(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}h{minutes:02d}m{seconds:02d}s' if hours else f'{minutes}m{seconds:02d}s'
+
+class SendPlan:
+    '''
+    Totals for a batch of messages as send would split them, without sending.
+
+    The completion estimate is the longer of the whole batch at the global
+    rate limit and the busiest webhook at the per-webhook limit.
+    '''
+    def __init__(self, global_rate=GLOBAL_RATE_LIMIT, webhook_rate=WEBHOOK_RATE_LIMIT):
+        self.global_rate = global_rate
+        self.webhook_rate = webhook_rate
+        self.messages = 0
+        self.requests = 0
+        self.bytes = 0
+        self.attachment_bytes = 0
+        self.webhook_requests = Counter()
+        self.webhook_keys = {}
+        self.errors = []
+
+    def add(self, url, avatar, username, content, embeds, file_str):
+        planned = plan_message(avatar, username, content, embeds, file_str)
+        # Jobs reuse a handful of webhooks, so each url is only parsed once.
+        if url not in self.webhook_keys:
+            self.webhook_keys[url] = webhook_id(url) or url
+        self.messages += 1
+        self.requests += planned['requests']
+        self.bytes += planned['bytes']
+        self.attachment_bytes += planned['attachment_bytes']
+        self.webhook_requests[self.webhook_keys[url]] += planned['requests']
+
+    def duration(self):
+        busiest = max(self.webhook_requests.values(), default=0)
+        return max(
+            self.requests / self.global_rate if self.global_rate else 0,
+            busiest / self.webhook_rate,
+        )
+
+    def report(self):
+        busiest = max(self.webhook_requests.values(), default=0)
+        lines = [
+            f'messages {self.messages}  requests {self.requests}  '
+            f'payloads {format_bytes(self.bytes)}  '
+            f'attachments {format_bytes(self.attachment_bytes)}',
+            f'webhooks {len(self.webhook_requests)}  busiest webhook {busiest} requests',
+            f'estimated time {format_duration(self.duration())}',
+        ]
+        if self.errors:
+            lines.append(f'{len(self.errors)} messages would fail')
+        return '\n'.join(lines)
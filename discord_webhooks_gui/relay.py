@@ -0,0 +1,225 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import traceback
+from socketserver import ThreadingMixIn, UnixStreamServer
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+from dispatch import LANES
+from core import (
+    send,
+    app_data_dir,
+    get_dispatcher,
+    embed_creation,
+    embed_dict_from_payload,
+    embed_limit_errors,
+    webhook_pattern,
+    PartialSendError,
+)
+
+class Relay:
+    '''
+    Queues incoming messages per webhook, sender identity and lane, and
+    merges the ones that arrive within `window` seconds into as few messages
+    as send can pack them in (content joined up to 2000 characters, 10 embeds).
+    '''
+    def __init__(self, window=2.0, parked_path=None):
+        self.window = window
+        self.parked_path = parked_path or os.path.join(app_data_dir(), 'relay.parked')
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.timers = {}
+        # One single threaded sender per webhook keeps its batches in order.
+        self.senders = {}
+        self.received = 0
+        self.requests = 0
+        self.parked = 0
+
+    def submit(self, message):
+        key = (
+            message['webhook'],
+            message.get('username', ''),
+            message.get('avatar_url', ''),
+            message['lane'],
+        )
+        with self.lock:
+            self.received += 1
+            self.pending.setdefault(key, []).append(message)
+            if key not in self.timers:
+                timer = threading.Timer(self.window, self.flush, (key,))
+                timer.daemon = True
+                self.timers[key] = timer
+                timer.start()
+
+    def flush(self, key):
+        with self.lock:
+            messages = self.pending.pop(key, [])
+            timer = self.timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+            if not messages:
+                return
+            # Each lane of a webhook has its own sender, so alerts don't queue behind bulk batches.
+            sender_key = (key[0], key[3])
+            if sender_key not in self.senders:
+                self.senders[sender_key] = ThreadPoolExecutor(max_workers=1)
+            sender = self.senders[sender_key]
+        sender.submit(self.send_batch, key, messages)
+
+    def send_batch(self, key, messages):
+        webhook, username, avatar, lane = key
+        content = '\n'.join(message['content'] for message in messages if message.get('content'))
+        embeds = [embed for message in messages for embed in message['embeds']]
+        try:
+            sent = send(webhook, avatar, username, content, embeds, '', lane)
+        except PartialSendError as error:
+            traceback.print_exc()
+            with self.lock:
+                self.requests += len(error.sent)
+            # Only the parts that were not delivered are kept to replay.
+            self.park([
+                {
+                    'webhook': webhook,
+                    'username': username,
+                    'avatar_url': avatar,
+                    'lane': lane,
+                    'content': part['content'],
+                    'embeds': part['embeds'],
+                }
+                for part in error.unsent
+            ], error.error)
+        except Exception as error:
+            # Retries already happened in send, whatever is left is kept to replay.
+            traceback.print_exc()
+            self.park(messages, error)
+        else:
+            with self.lock:
+                self.requests += len(sent)
+
+    def park(self, messages, error):
+        with self.lock, open(self.parked_path, 'a', encoding='utf-8') as file:
+            self.parked += len(messages)
+            for message in messages:
+                file.write(json.dumps({
+                    **message,
+                    'embeds': [embed.to_dict() for embed in message['embeds']],
+                    'error': str(error),
+                }) + '\n')
+
+    def stats(self):
+        with self.lock:
+            return {
+                'received': self.received,
+                'requests': self.requests,
+                'parked': self.parked,
+                'pending': sum(len(messages) for messages in self.pending.values()),
+                'lanes': get_dispatcher().stats(),
+            }
+
+    def close(self):
+        for key in list(self.pending):
+            self.flush(key)
+        for sender in list(self.senders.values()):
+            sender.shutdown(wait=True)
+
+def parse_message(body):
+    message = json.loads(body)
+    if not isinstance(message, dict) or not message.get('webhook'):
+        raise ValueError('A message needs a webhook url')
+    if not isinstance(message['webhook'], str) or not webhook_pattern(message['webhook']):
+        raise ValueError('The webhook url is not a Discord webhook url')
+    for key in ('content', 'username', 'avatar_url', 'lane'):
+        if not isinstance(message.get(key, ''), str):
+            raise ValueError(f'{key} must be a string')
+    if not isinstance(message.get('embeds', []), list):
+        raise ValueError('embeds must be a list')
+    for index, embed in enumerate(message.get('embeds', [])):
+        if not isinstance(embed, dict):
+            raise ValueError(f'Embed {index+1} must be an object')
+        color = embed.get('color')
+        if color is not None and (type(color) is not int or not 0 <= color <= 0xFFFFFF):
+            raise ValueError(f'Embed {index+1}: color must be an integer from 0 to 16777215')
+    embeds = [embed_creation(embed_dict_from_payload(embed)) for embed in message.get('embeds', [])]
+    for index, embed in enumerate(embeds):
+        errors = embed_limit_errors(embed)
+        if errors:
+            raise ValueError(f"Embed {index+1}: {', '.join(errors)}")
+    if not message.get('content') and not embeds:
+        raise ValueError('There must be a content or a embed at least')
+    lane = message.get('lane', 'alert')
+    if lane not in LANES:
+        raise ValueError(f'Unknown lane {lane}, expected one of {", ".join(LANES)}')
+    return {**message, 'embeds': embeds, 'lane': lane}
+
+class RelayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.reply(200, self.server.relay.stats())
+        else:
+            self.reply(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            message = parse_message(body)
+        except (ValueError, TypeError, AttributeError) as error:
+            self.reply(400, {'error': str(error)})
+            return
+        self.server.relay.submit(message)
+        self.reply(202, {'queued': True})
+
+    def log_message(self, format, *args):
+        pass
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Relay JSON messages from local services to Discord webhooks'
+    )
+    parser.add_argument('--port', type=int, default=8765, help='localhost HTTP port')
+    parser.add_argument('--socket', help='listen on this Unix socket instead')
+    parser.add_argument(
+        '--window', type=float, default=2.0,
+        help='seconds to wait for more messages to the same webhook',
+    )
+    args = parser.parse_args(argv)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, RelayHandler)
+    else:
+        server = ThreadingHTTPServer(('127.0.0.1', args.port), RelayHandler)
+        server.daemon_threads = True
+    server.relay = Relay(args.window)
+    print(f'Relaying on {args.socket or f"http://127.0.0.1:{args.port}"}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.relay.close()
+        stats = server.relay.stats()
+        print(
+            f"{stats['received']} messages relayed in {stats['requests']} requests, "
+            f"{stats['parked']} parked",
+            file=sys.stderr,
+        )
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import os
+import io
+import hashlib
+import zipfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from core import FILE_SIZE_LIMIT, app_data_dir
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp', '.tif', '.tiff')
+
+# Ordered from the mildest to the most aggressive, the first one that fits wins.
+IMAGE_SETTINGS = [
+    (1.0, 90), (1.0, 80), (1.0, 70),
+    (0.75, 80), (0.75, 70),
+    (0.5, 75), (0.5, 60),
+    (0.35, 60), (0.25, 50),
+]
+ZIP_LEVELS = [1, 6, 9]
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # The pool is first needed from a worker thread of the running Qt
+            # app, and forking a multithreaded process can deadlock the child.
+            _executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def encode_image(path, limit):
+    if Image is None:
+        raise Exception("Pillow is required to shrink images")
+    with Image.open(path) as image:
+        image = image.convert('RGB')
+        for scale, quality in IMAGE_SETTINGS:
+            size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+            buffer = io.BytesIO()
+            image.resize(size).save(buffer, 'JPEG', quality=quality, optimize=True)
+            if buffer.tell() <= limit:
+                return '.jpg', buffer.getvalue()
+    return None
+
+def encode_archive(path, limit):
+    for level in ZIP_LEVELS:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+            archive.write(path, os.path.basename(path))
+        if buffer.tell() <= limit:
+            return '.zip', buffer.getvalue()
+    return None
+
+def transcode(path, target_dir, limit):
+    # Runs in a worker process, the result is written next to the cache key
+    # and only renamed into place once complete.
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        result = encode_image(path, limit)
+    else:
+        result = encode_archive(path, limit)
+    if result is None:
+        return None
+    extension, data = result
+    name = os.path.splitext(os.path.basename(path))[0] + extension
+    target = os.path.join(target_dir, name)
+    with open(target + '.tmp', 'wb') as file:
+        file.write(data)
+    os.replace(target + '.tmp', target)
+    return target
+
+def cached(target_dir):
+    for name in os.listdir(target_dir):
+        if not name.endswith('.tmp'):
+            return os.path.join(target_dir, name)
+    return None
+
+def fit_to_limit(path, limit=FILE_SIZE_LIMIT):
+    if os.path.getsize(path) <= limit:
+        return path
+    target_dir = app_data_dir('transcoded', f'{file_hash(path)}-{limit}')
+    target = cached(target_dir)
+    if target is None:
+        target = executor().submit(transcode, path, target_dir, limit).result()
+    if target is None:
+        raise Exception(
+            f"{os.path.basename(path)} could not be reduced under {limit // (1024 * 1024)} MB"
+        )
+    return target
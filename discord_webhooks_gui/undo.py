@@ -0,0 +1,77 @@
+from collections import deque
+from types import MappingProxyType
+
+def freeze(value, previous=None):
+    '''
+    Returns an immutable copy of `value` made of tuples and read-only
+    mappings. Any part equal to the matching part of `previous` is reused
+    from it, so consecutive snapshots share everything that did not change.
+    '''
+    if isinstance(value, dict):
+        old = previous if isinstance(previous, MappingProxyType) else {}
+        items = {key: freeze(item, old.get(key)) for key, item in value.items()}
+        if old is previous and items.keys() == old.keys() and all(
+            items[key] is old[key] for key in items
+        ):
+            return previous
+        return MappingProxyType(items)
+    if isinstance(value, (list, tuple)):
+        old = previous if isinstance(previous, tuple) else ()
+        items = tuple(
+            freeze(item, old[index] if index < len(old) else None)
+            for index, item in enumerate(value)
+        )
+        if old is previous and len(items) == len(old) and all(
+            a is b for a, b in zip(items, old)
+        ):
+            return previous
+        return items
+    return previous if type(value) is type(previous) and value == previous else value
+
+def thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+class UndoStack:
+    '''
+    Undo and redo over frozen snapshots of a window's state.
+
+    Snapshots share unchanged parts with their neighbours, so a step costs
+    the containers on the path to what changed rather than a full copy.
+    '''
+    def __init__(self, limit=500):
+        self.undo_states = deque(maxlen=limit)
+        self.redo_states = []
+        self.current = None
+
+    def reset(self, state):
+        self.undo_states.clear()
+        self.redo_states.clear()
+        self.current = freeze(state)
+
+    def push(self, state):
+        frozen = freeze(state, self.current)
+        if frozen is self.current:
+            return False
+        if self.current is not None:
+            self.undo_states.append(self.current)
+        self.current = frozen
+        self.redo_states.clear()
+        return True
+
+    def undo(self):
+        if not self.undo_states:
+            return None
+        self.redo_states.append(self.current)
+        self.current = self.undo_states.pop()
+        return thaw(self.current)
+
+    def redo(self):
+        if not self.redo_states:
+            return None
+        self.undo_states.append(self.current)
+        self.current = self.redo_states.pop()
+        return thaw(self.current)
@@ -1,11 +1,63 @@
 import sys
+from instance import server_name, launch_request, forward_to_running, stale_server
+
+if __name__ == '__main__':
+    # Hand off to a running instance before paying for the Qt and network imports.
+    request = launch_request(sys.argv[1:])
+    if forward_to_running(request):
+        sys.exit(0)
+
+import json
 import traceback
-from core import webhook_validator, embed_dict_creation, embed_creation, field_dict_creation, send
+from datetime import datetime
+from core import (
+    webhook_validator,
+    embed_dict_creation,
+    embed_creation,
+    field_dict_creation,
+    send,
+    edit_message,
+    message_payload,
+    embed_dict_from_payload,
+    webhook_id,
+    circuit_breaker,
+    embed_length,
+    field_length,
+    limit_errors,
+    CONTENT_LIMIT,
+    EMBEDS_PER_MESSAGE,
+    EMBED_TOTAL_LIMIT,
+    EMBED_PART_LIMITS,
+    USERNAME_LIMIT,
+    PartialSendError,
+)
+from transcoder import fit_to_limit
+from history import History
+from drafts import DraftJournal
+from messages_io import import_messages, export_messages
+from undo import UndoStack
+from planner import format_bytes
 from WebhookWindow import Ui_Webhook
 from EmbedWindow import Ui_Embed
 from FieldWindow import Ui_Field
-from PySide6.QtGui import QScreen
-from PySide6.QtCore import QRunnable, Slot, QThreadPool, QObject, Signal
+from PySide6.QtGui import QScreen, QKeySequence, QShortcut
+from PySide6.QtCore import (
+    QRunnable,
+    Slot,
+    QThreadPool,
+    QObject,
+    Signal,
+    QRect,
+    Qt,
+    QTimer,
+    QModelIndex,
+    QAbstractTableModel,
+    QByteArray,
+    QBuffer,
+    QIODevice,
+    QEvent,
+)
+from PySide6.QtNetwork import QLocalServer, QAbstractSocket
 from PySide6.QtWidgets import (
     QApplication,
     QColorDialog,
@@ -14,8 +66,28 @@ from PySide6.QtWidgets import (
     QMainWindow,
     QFileDialog,
     QMessageBox,
+    QLabel,
+    QCheckBox,
+    QLineEdit,
+    QTextEdit,
+    QTableView,
+    QVBoxLayout,
+    QHeaderView,
+    QAbstractItemView,
 )
 
+def take_undo_keys(window):
+    # Text inputs claim Ctrl+Z for their own undo, which only knows their
+    # own text. The window's undo covers every input, so it takes the keys.
+    for widget in window.findChildren(QWidget):
+        if isinstance(widget, (QLineEdit, QTextEdit)):
+            widget.installEventFilter(window)
+
+def is_undo_key(event):
+    return event.type() == QEvent.ShortcutOverride and (
+        event.matches(QKeySequence.Undo) or event.matches(QKeySequence.Redo)
+    )
+
 def center_window(window):
     center = QScreen.availableGeometry(QApplication.primaryScreen()).center()
     geo = window.frameGeometry()
@@ -91,6 +163,23 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
         self.setupUi(self)
         center_window(self)
         self.embeds = []
+        self.embeds_length = 0
+        self.sent_embeds = {}
+        self.history = History()
+        self.history_window = None
+        self.open_editor = None
+        self.drafts = DraftJournal()
+        # Autosave runs once typing pauses rather than on every keystroke.
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.setSingleShot(True)
+        self.autosaveTimer.setInterval(500)
+        self.autosaveTimer.timeout.connect(self.autosave)
+        # Shows the webhook as usable again once its breaker cools down.
+        self.cooldownTimer = QTimer(self)
+        self.cooldownTimer.setSingleShot(True)
+        self.cooldownTimer.timeout.connect(self.update_webhook_state)
+        self.undo_stack = UndoStack()
+        self.attachment = None
         self.avatar_value = None
         self.username_value = None
         self.webhook_request_status = False
@@ -99,20 +188,64 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
         self.success = QMessageBox()
         self.success.setIcon(QMessageBox.Information)
         self.embed_window = None
+        self.edit_window = None
         self.threadpool = QThreadPool()
+        self.sizeLabel = QLabel(self.groupBox)
+        self.sizeLabel.setGeometry(QRect(80, 170, 321, 16))
+        self.sizeLabel.setAlignment(Qt.AlignRight)
+        self.webhookStateLabel = QLabel(self.groupBox)
+        self.webhookStateLabel.setGeometry(QRect(120, 20, 281, 16))
+        self.webhookStateLabel.setAlignment(Qt.AlignRight)
+        self.webhookStateLabel.setStyleSheet('color:red;')
+        self.transcodeCheckbox = QCheckBox('Shrink files over 8 MB', self.groupBox)
+        self.transcodeCheckbox.setGeometry(QRect(60, 408, 261, 20))
+        self.fileMenu = self.menuBar().addMenu('File')
+        self.fileMenu.addAction('Import...', self.import_dialog)
+        self.fileMenu.addAction('Export...', self.export_dialog)
+        self.fileMenu.addSeparator()
+        self.fileMenu.addAction('History', self.open_history)
+        self.editMenu = self.menuBar().addMenu('Edit')
+        self.editMenu.addAction('Undo', self.undo).setShortcuts(QKeySequence.Undo)
+        self.editMenu.addAction('Redo', self.redo).setShortcuts(QKeySequence.Redo)
+        self.editMenu.addSeparator()
+        self.editMenu.addAction(
+            'Paste Attachment', self.paste_attachment
+        ).setShortcut(QKeySequence('Ctrl+Shift+V'))
+        self.setFixedSize(self.width(), self.height() + self.menuBar().sizeHint().height())
         self.webhookInput.textEdited.connect(self.check_webhook_worker)
         self.addEmbedButton.clicked.connect(self.add_embed_window)
         self.content.textChanged.connect(self.check_sending_conditions)
+        self.content.textChanged.connect(self.update_size_label)
+        self.usernameInput.textChanged.connect(self.check_sending_conditions)
         self.embedsList.model().rowsInserted.connect(self.check_sending_conditions)
         self.embedsList.model().rowsRemoved.connect(self.check_sending_conditions)
         self.searchFileButton.clicked.connect(self.file_dialog)
         self.fileDirInput.textChanged.connect(self.check_sending_conditions)
+        self.fileDirInput.textChanged.connect(self.release_attachment)
+        # Images and files pasted or dropped on the window become the attachment.
+        self.setAcceptDrops(True)
+        self.content.setAcceptRichText(False)
+        take_undo_keys(self)
+        self.content.viewport().installEventFilter(self)
         self.sendButton.clicked.connect(self.webhook_sender_worker)
         self.editEmbedButton.clicked.connect(self.edit_embed_window)
         self.embedsList.selectionModel().selectionChanged.connect(self.embed_selected)
         self.deleteEmbedButton.clicked.connect(self.delete_embed)
+        for signal in (
+            self.webhookInput.textChanged,
+            self.avatarInput.textChanged,
+            self.usernameInput.textChanged,
+            self.content.textChanged,
+            self.fileDirInput.textChanged,
+            self.embedsList.model().rowsInserted,
+            self.embedsList.model().rowsRemoved,
+        ):
+            signal.connect(self.schedule_autosave)
+        self.update_size_label()
     
         self.show()
+        self.restore_draft()
+        self.undo_stack.reset(self.composer_state())
     
     def embed_selected(self, e):
         if len(self.embeds) > 0:
@@ -125,25 +258,227 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
             self.deleteEmbedButton.setDisabled(True)
 
     def add_embed_window(self):
-        self.embed_window = EmbedWindow(self)
+        # Editors are built on first use and reset on every later open.
+        if self.embed_window is None:
+            self.embed_window = EmbedWindow(self)
+        self.embed_window.reset()
+        self.open_editor = self.embed_window
         self.hide()
+        center_window(self.embed_window)
         self.embed_window.show()
 
     def edit_embed_window(self):
-        self.edit_window = EditEmbedWindow(self)
+        if self.edit_window is None:
+            self.edit_window = EditEmbedWindow(self)
+        self.edit_window.load_embed()
+        self.open_editor = self.edit_window
         self.hide()
+        center_window(self.edit_window)
         self.edit_window.show()
 
+    def schedule_autosave(self, *args):
+        self.autosaveTimer.start()
+
+    def composer_state(self):
+        state = {
+            'webhook': self.webhookInput.text(),
+            'avatar': self.avatarInput.text(),
+            'username': self.usernameInput.text(),
+            'content': self.content.toPlainText(),
+            'file': '' if self.current_attachment() else self.fileDirInput.text(),
+            'embeds': len(self.embeds),
+        }
+        # One key per embed, so the journal only rewrites the embeds that changed.
+        for index, embed in enumerate(self.embeds):
+            state[f'embed.{index}'] = embed.to_dict()
+        return state
+
+    def draft_state(self):
+        return {
+            **self.composer_state(),
+            'webhook_valid': self.webhook_request_status,
+            'editor': self.open_editor.draft_state() if self.open_editor else None,
+        }
+
+    def autosave(self):
+        self.autosaveTimer.stop()
+        self.drafts.save(self.draft_state())
+        # Undo steps are taken at the same pauses in typing as autosaves.
+        self.undo_stack.push(self.composer_state())
+        if self.open_editor:
+            self.open_editor.undo_stack.push(self.open_editor.draft_state())
+
+    def load_composer_state(self, state):
+        self.avatarInput.setText(state['avatar'])
+        self.usernameInput.setText(state['username'])
+        if state['file'] or not self.current_attachment():
+            # A pasted attachment is saved as no file, undo must not drop it.
+            self.fileDirInput.setText(state['file'])
+        embeds = []
+        for index in range(state['embeds']):
+            payload = state[f'embed.{index}']
+            # Unchanged embeds keep their identity, and with it their sent message.
+            if index < len(self.embeds) and self.embeds[index].to_dict() == payload:
+                embeds.append(self.embeds[index])
+            else:
+                embeds.append(embed_creation(embed_dict_from_payload(payload)))
+        self.load_message(state['content'], embeds)
+        if state['webhook'] != self.webhookInput.text():
+            self.webhookInput.setText(state['webhook'])
+            if 'webhook_valid' in state:
+                # A restored draft keeps the result of its last check.
+                self.webhook_request_status = state['webhook_valid']
+                self.update_webhook_state()
+            else:
+                self.check_webhook_quietly()
+
+    def undo(self):
+        self.autosave()
+        state = self.undo_stack.undo()
+        if state is not None:
+            self.load_composer_state(state)
+
+    def redo(self):
+        self.autosave()
+        state = self.undo_stack.redo()
+        if state is not None:
+            self.load_composer_state(state)
+
+    def restore_draft(self):
+        state = self.drafts.load()
+        if not state:
+            return
+        self.load_composer_state(state)
+        editor = state['editor']
+        if editor:
+            if editor['index'] is None:
+                self.add_embed_window()
+            else:
+                self.embedsList.setCurrentRow(editor['index'])
+                self.edit_embed_window()
+            self.open_editor.load_draft(editor)
+            self.open_editor.undo_stack.reset(self.open_editor.draft_state())
+
+    def closeEvent(self, event):
+        self.autosave()
+        self.drafts.compact()
+
+    def listen_for_handoff(self):
+        self.instanceServer = QLocalServer(self)
+        if (not self.instanceServer.listen(server_name()) and
+                self.instanceServer.serverError() == QAbstractSocket.AddressInUseError and
+                stale_server()):
+            # Left behind by an instance that crashed. A live instance that
+            # was too busy to take the handoff keeps its socket.
+            QLocalServer.removeServer(server_name())
+            self.instanceServer.listen(server_name())
+        self.instanceServer.newConnection.connect(self.handoff_connection)
+
+    def handoff_connection(self):
+        connection = self.instanceServer.nextPendingConnection()
+        connection.readyRead.connect(lambda: self.handoff_ready(connection))
+        connection.disconnected.connect(connection.deleteLater)
+
+    def handoff_ready(self, connection):
+        if not connection.canReadLine():
+            return
+        request = json.loads(bytes(connection.readLine()).decode())
+        connection.write(b'ok\n')
+        connection.flush()
+        self.handoff(request)
+
+    def handoff(self, request):
+        if request['file']:
+            self.fileDirInput.setText(request['file'])
+        if request['message']:
+            self.import_file(request['message'])
+        window = self.open_editor or self
+        window.showNormal()
+        window.raise_()
+        window.activateWindow()
+
+    def open_history(self):
+        if self.history_window is None:
+            self.history_window = HistoryWindow(self)
+        self.history_window.show()
+        self.history_window.raise_()
+
+    def import_dialog(self):
+        file_name = QFileDialog.getOpenFileName(
+            self, "Import Messages", "", "JSON (*.json *.jsonl);;All Files (*)"
+        )
+        if file_name[0]:
+            self.import_file(file_name[0])
+
+    def import_file(self, path):
+        import_worker = WebhookSenderWoker(import_messages, path)
+        import_worker.signals.result.connect(self.import_finished)
+        import_worker.signals.error.connect(self.worker_error)
+        self.threadpool.start(import_worker)
+
+    def import_finished(self, result):
+        content, embeds, errors = result
+        current = self.content.toPlainText()
+        self.load_message(
+            '\n'.join(text for text in (current, content) if text),
+            self.embeds + embeds,
+        )
+        if errors:
+            self.error.setText(
+                f'{len(errors)} embeds were skipped:\n' + '\n'.join(errors[:10])
+            )
+            self.error.exec()
+
+    def export_dialog(self):
+        file_name = QFileDialog.getSaveFileName(
+            self, "Export Messages", "message.json", "JSON (*.json)"
+        )
+        if file_name[0]:
+            export_messages(
+                file_name[0],
+                self.content.toPlainText(),
+                self.embeds,
+                self.usernameInput.text(),
+                self.avatarInput.text(),
+            )
+
+    def load_message(self, content, embeds):
+        self.content.setPlainText(content)
+        self.embeds = embeds
+        self.embeds_length = sum(embed_length(embed) for embed in embeds)
+        self.embedsList.clear()
+        self.embedsList.addItems([f'Embed: {i+1}' for i in range(len(self.embeds))])
+        self.update_size_label()
+        self.check_sending_conditions()
+
     def delete_embed(self):
         selected_item = self.embedsList.selectedItems()[0]
         selected_index = self.embedsList.row(selected_item)
-        self.embeds.pop(selected_index)
+        embed = self.embeds.pop(selected_index)
+        self.sent_embeds.pop(embed, None)
+        self.update_embeds_length(-embed_length(embed))
         self.embedsList.clear()
         self.embedsList.addItems(
             [f'Embed: {i+1}' for i in range(len(self.embeds))]
         )
         self.check_sending_conditions()
 
+    def update_embeds_length(self, delta):
+        self.embeds_length += delta
+        self.update_size_label()
+
+    def update_size_label(self):
+        content_length = self.content.document().characterCount() - 1
+        text = (
+            f'Content: {content_length}/{CONTENT_LIMIT}  '
+            f'Embeds: {self.embeds_length}/{EMBED_TOTAL_LIMIT}'
+        )
+        if (content_length > CONTENT_LIMIT or
+            self.embeds_length > EMBED_TOTAL_LIMIT or
+            len(self.embeds) > EMBEDS_PER_MESSAGE):
+            text += '  (sent in parts)'
+        self.sizeLabel.setText(text)
+
     def update_webhook_data(self, data):
         # print('update', data)
         pass
@@ -165,19 +500,44 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
                 self.error.exec()
         self.avatar_value=None
         self.username_value=None
+        self.update_webhook_state()
+
+    def update_webhook_state(self):
+        url = self.webhookInput.text()
+        breaker = circuit_breaker(url)
+        self.webhookStateLabel.setText(breaker.describe() if url else '')
+        cooldown = breaker.cooldown_left() if url else 0
+        if cooldown:
+            self.cooldownTimer.start(int(cooldown * 1000) + 1)
+        else:
+            self.cooldownTimer.stop()
+        self.check_sending_conditions()
     
     def progress_fn(self, n):
         pass
         # print('done ', n)
 
     def check_webhook_worker(self):
+        self.start_webhook_check(self.thread_complete)
+
+    def check_webhook_quietly(self):
+        # For webhooks set by undo rather than typed: no dialog, and the
+        # username and avatar inputs are left alone.
+        self.start_webhook_check(self.quiet_check_complete)
+
+    def start_webhook_check(self, finished):
         worker = checkWebhookWorker(self.check_webhook)
         worker.signals.result.connect(self.update_webhook_data)
-        worker.signals.finished.connect(self.thread_complete)
+        worker.signals.finished.connect(finished)
         worker.signals.progress.connect(self.progress_fn)
 
         self.threadpool.start(worker)
 
+    def quiet_check_complete(self):
+        self.avatar_value = None
+        self.username_value = None
+        self.update_webhook_state()
+
     def check_webhook(self, callback):
         webhook_url = self.webhookInput.text()
         response = webhook_validator(webhook_url)
@@ -192,11 +552,78 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
         self.check_sending_conditions()
 
     def file_dialog(self):
-        file_name = QFileDialog.getOpenFileName(self, "Open File", "c:\\")
-        self.fileDirInput.setText(file_name[0])
+        file_name = QFileDialog.getOpenFileName(self, "Open File")
+        if file_name[0]:
+            self.fileDirInput.setText(file_name[0])
+
+    def attachment_label(self):
+        name, data = self.attachment
+        return f'{name} (in memory, {format_bytes(len(data))})'
+
+    def current_attachment(self):
+        if self.attachment is not None and self.fileDirInput.text() == self.attachment_label():
+            return self.attachment
+        return None
+
+    def release_attachment(self):
+        # Any other text in the input, including the clear after a send, frees the bytes.
+        if self.attachment is not None and self.fileDirInput.text() != self.attachment_label():
+            self.attachment = None
+
+    def attachable(self, mime):
+        return mime.hasImage() or any(url.isLocalFile() for url in mime.urls())
+
+    def attach_mime_data(self, mime):
+        paths = [url.toLocalFile() for url in mime.urls() if url.isLocalFile()]
+        if paths:
+            # Files already on disk are sent from their path.
+            self.fileDirInput.setText(paths[0])
+            return True
+        if mime.hasImage():
+            data = QByteArray()
+            buffer = QBuffer(data)
+            buffer.open(QIODevice.WriteOnly)
+            mime.imageData().save(buffer, 'PNG')
+            buffer.close()
+            # A view of the encoded PNG, so the bytes are not copied out of Qt.
+            self.attachment = ('image.png', memoryview(data))
+            self.fileDirInput.setText(self.attachment_label())
+            return True
+        return False
+
+    def paste_attachment(self):
+        if not self.attach_mime_data(QApplication.clipboard().mimeData()):
+            self.error.setText('The clipboard holds no image or file')
+            self.error.exec()
+
+    def dragEnterEvent(self, event):
+        if self.attachable(event.mimeData()):
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        if self.attach_mime_data(event.mimeData()):
+            event.acceptProposedAction()
+
+    def eventFilter(self, watched, event):
+        if is_undo_key(event):
+            return True  # left unaccepted, so the Undo and Redo actions fire
+        if event.type() in (QEvent.DragEnter, QEvent.DragMove) and self.attachable(event.mimeData()):
+            event.acceptProposedAction()
+            return True
+        if event.type() == QEvent.Drop and self.attach_mime_data(event.mimeData()):
+            event.acceptProposedAction()
+            return True
+        if event.type() == QEvent.KeyPress and event.matches(QKeySequence.Paste):
+            # Plain text pastes as usual, a screenshot becomes the attachment.
+            mime = QApplication.clipboard().mimeData()
+            if mime.hasImage() and self.attach_mime_data(mime):
+                return True
+        return super().eventFilter(watched, event)
 
     def check_sending_conditions(self):
-        if self.webhook_request_status:
+        if (self.webhook_request_status and
+            len(self.usernameInput.text()) <= USERNAME_LIMIT and
+            not circuit_breaker(self.webhookInput.text()).is_open()):
             if (len(self.content.toPlainText()) > 0 or 
                 self.embedsList.count() > 0 or 
                 len(self.fileDirInput.text()) > 0):
@@ -210,6 +637,7 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
         sender_worker = WebhookSenderWoker(self.send_webhook)
         sender_worker.signals.result.connect(self.sender_update)
         sender_worker.signals.finished.connect(self.sender_finished)
+        sender_worker.signals.error.connect(self.worker_error)
         sender_worker.signals.progress.connect(self.sender_progress)
         self.sendButton.setDisabled(True)
         self.threadpool.start(sender_worker)
@@ -217,25 +645,74 @@ class WebHookWindow(QMainWindow, Ui_Webhook):
     def sender_progress(self, e):
         pass
     
-    def sender_update(self,e):
-        pass 
+    def sender_update(self, sent):
+        for record in sent:
+            for position, embed in enumerate(record['embeds']):
+                self.sent_embeds[embed] = (record, position)
+
+    def edit_sent_worker(self, record):
+        edit_worker = WebhookSenderWoker(edit_message, record, lane='interactive')
+        edit_worker.signals.error.connect(self.worker_error)
+        self.threadpool.start(edit_worker)
+
+    def worker_error(self, error):
+        if isinstance(error[1], PartialSendError):
+            # The delivered parts can still be edited.
+            self.sender_update(error[1].sent)
+        self.error.setText(str(error[1]))
+        self.error.exec()
 
     def sender_finished(self):
         # print('Webhook has been sent')
         self.content.clear()
         self.fileDirInput.clear()
-        self.check_sending_conditions()
+        self.update_webhook_state()
 
     def send_webhook(self):
         # print('Sending Webhook')
-        send(
-            self.webhookInput.text(),
-            self.avatarInput.text(),
-            self.usernameInput.text(),
-            self.content.toPlainText(),
-            self.embeds,
-            self.fileDirInput.text()
-        )
+        attachment = self.current_attachment()
+        file_str = '' if attachment else self.fileDirInput.text()
+        try:
+            if file_str and self.transcodeCheckbox.isChecked():
+                file_str = fit_to_limit(file_str)
+            sent = send(
+                self.webhookInput.text(),
+                self.avatarInput.text(),
+                self.usernameInput.text(),
+                self.content.toPlainText(),
+                self.embeds,
+                file_str,
+                'interactive',
+                attachment,
+            )
+        except PartialSendError as error:
+            self.history.record_sent(error.sent)
+            for part in error.unsent:
+                self.history.record(
+                    self.webhookInput.text(),
+                    message_payload(
+                        part['content'],
+                        part['embeds'],
+                        self.usernameInput.text(),
+                        self.avatarInput.text(),
+                    ),
+                    'failed',
+                )
+            raise
+        except Exception:
+            self.history.record(
+                self.webhookInput.text(),
+                message_payload(
+                    self.content.toPlainText(),
+                    self.embeds,
+                    self.usernameInput.text(),
+                    self.avatarInput.text(),
+                ),
+                'failed',
+            )
+            raise
+        self.history.record_sent(sent)
+        return sent
 
 
 class EmbedWindow(QWidget, Ui_Embed):
@@ -244,12 +721,21 @@ class EmbedWindow(QWidget, Ui_Embed):
         self.setupUi(self)
         center_window(self)
         self.fields = []
+        self.part_lengths = dict.fromkeys(EMBED_PART_LIMITS, 0)
+        self.embed_length = 0
+        self.original_length = 0
         self.embeds_colors = []
+        self.undo_stack = UndoStack()
         self.nonCriticalError = QMessageBox()
         self.nonCriticalError.setIcon(QMessageBox.Warning)
         self.nonCriticalError.setWindowTitle('Error')
         self.webhook_window = webhook_window
         self.field_window = None
+        self.edit_field = None
+        self.sizeLabel = QLabel(self)
+        self.mainVerticalLayout.insertWidget(
+            self.mainVerticalLayout.indexOf(self.line_2), self.sizeLabel
+        )
         self.fieldsList.selectionModel().selectionChanged.connect(self.field_selected)
         self.addFieldButton.clicked.connect(self.add_field_window)
         self.editFieldButton.clicked.connect(self.edit_field_window)
@@ -258,6 +744,150 @@ class EmbedWindow(QWidget, Ui_Embed):
         self.deleteFieldButton.clicked.connect(self.delete_field)
         self.embedTitle.textChanged.connect(self.enable_title_url)
         self.footerInput.textChanged.connect(self.enable_footer_icon_url)
+        self.authorInput.textChanged.connect(
+            lambda text: self.update_part_length('author', len(text))
+        )
+        self.embedTitle.textChanged.connect(
+            lambda text: self.update_part_length('title', len(text))
+        )
+        self.embedDescription.textChanged.connect(
+            lambda: self.update_part_length(
+                'description', self.embedDescription.document().characterCount() - 1
+            )
+        )
+        self.footerInput.textChanged.connect(
+            lambda text: self.update_part_length('footer', len(text))
+        )
+        for signal in (
+            self.authorInput.textChanged,
+            self.authorURL.textChanged,
+            self.authorIconURL.textChanged,
+            self.embedTitle.textChanged,
+            self.embedDescription.textChanged,
+            self.embedURL.textChanged,
+            self.colorInput.textChanged,
+            self.imageInput.textChanged,
+            self.thumbnailInput.textChanged,
+            self.footerInput.textChanged,
+            self.footerIconURL.textChanged,
+            self.timestampCheckbox.toggled,
+            self.fieldsList.model().rowsInserted,
+            self.fieldsList.model().rowsRemoved,
+        ):
+            signal.connect(self.webhook_window.schedule_autosave)
+        for keys, action in ((QKeySequence.Undo, self.undo), (QKeySequence.Redo, self.redo)):
+            shortcut = QShortcut(self)
+            shortcut.setKeys(keys)
+            shortcut.activated.connect(action)
+        take_undo_keys(self)
+        self.update_size_label()
+
+    def eventFilter(self, watched, event):
+        if is_undo_key(event):
+            return True  # left unaccepted, so the Undo and Redo shortcuts fire
+        return super().eventFilter(watched, event)
+
+    def draft_state(self):
+        return {
+            'index': None,
+            'author': self.authorInput.text(),
+            'authorUrl': self.authorURL.text(),
+            'authorIconUrl': self.authorIconURL.text(),
+            'title': self.embedTitle.text(),
+            'description': self.embedDescription.toPlainText(),
+            'bodyUrl': self.embedURL.text(),
+            'color': self.colorInput.text(),
+            'fields': [dict(field) for field in self.fields],
+            'image': self.imageInput.text(),
+            'thumbnail': self.thumbnailInput.text(),
+            'footer': self.footerInput.text(),
+            'timestamp': self.timestampCheckbox.isChecked(),
+            'footerIconUrl': self.footerIconURL.text(),
+        }
+
+    def reset(self):
+        for line_edit in (
+            self.authorInput,
+            self.authorURL,
+            self.authorIconURL,
+            self.embedTitle,
+            self.embedURL,
+            self.colorInput,
+            self.imageInput,
+            self.thumbnailInput,
+            self.footerInput,
+            self.footerIconURL,
+        ):
+            line_edit.clear()
+        self.embedDescription.clear()
+        self.colorInput.setStyleSheet('')
+        self.timestampCheckbox.setChecked(False)
+        self.update_fields_length(-sum(field_length(field) for field in self.fields))
+        self.fields = []
+        self.fieldsList.clear()
+        self.editFieldButton.setDisabled(True)
+        self.deleteFieldButton.setDisabled(True)
+        self.original_length = 0
+        self.update_size_label()
+        self.undo_stack.reset(self.draft_state())
+
+    def undo(self):
+        self.webhook_window.autosave()
+        draft = self.undo_stack.undo()
+        if draft is not None:
+            self.load_draft(draft)
+
+    def redo(self):
+        self.webhook_window.autosave()
+        draft = self.undo_stack.redo()
+        if draft is not None:
+            self.load_draft(draft)
+
+    def load_draft(self, draft):
+        self.authorInput.setText(draft['author'])
+        self.authorURL.setText(draft['authorUrl'])
+        self.authorIconURL.setText(draft['authorIconUrl'])
+        self.embedTitle.setText(draft['title'])
+        self.embedDescription.setPlainText(draft['description'])
+        self.embedURL.setText(draft['bodyUrl'])
+        self.colorInput.setText(draft['color'])
+        self.colorInput.setStyleSheet(
+            f"background-color:{draft['color']};color:{draft['color']};"
+            if draft['color'] else ''
+        )
+        self.imageInput.setText(draft['image'])
+        self.thumbnailInput.setText(draft['thumbnail'])
+        self.footerInput.setText(draft['footer'])
+        self.timestampCheckbox.setChecked(draft['timestamp'])
+        self.footerIconURL.setText(draft['footerIconUrl'])
+        self.update_fields_length(
+            sum(field_length(field) for field in draft['fields'])
+            - sum(field_length(field) for field in self.fields)
+        )
+        self.fields = draft['fields']
+        self.fieldsList.clear()
+        self.fieldsList.addItems([field['name'] for field in self.fields])
+
+    def update_part_length(self, part, length):
+        self.embed_length += length - self.part_lengths[part]
+        self.part_lengths[part] = length
+        self.update_size_label()
+
+    def update_fields_length(self, delta):
+        self.embed_length += delta
+        self.update_size_label()
+
+    def update_size_label(self):
+        message_length = (
+            self.webhook_window.embeds_length - self.original_length + self.embed_length
+        )
+        errors = limit_errors(self.part_lengths, [], self.embed_length)
+        self.sizeLabel.setText('  '.join([
+            f'Embed: {self.embed_length}/{EMBED_TOTAL_LIMIT}',
+            f'Message: {message_length}/{EMBED_TOTAL_LIMIT}',
+            *errors
+        ]))
+        self.sizeLabel.setStyleSheet('color:red;' if errors else '')
 
     def enable_footer_icon_url(self):
         if len(self.footerInput.text()) > 0:
@@ -284,23 +914,31 @@ class EmbedWindow(QWidget, Ui_Embed):
             self.deleteFieldButton.setDisabled(True)
 
     def add_field_window(self):
-        self.field_window = FieldWindow(self)
+        if self.field_window is None:
+            self.field_window = FieldWindow(self)
+        self.field_window.reset()
         self.hide()
+        center_window(self.field_window)
         self.field_window.show()
 
     def edit_field_window(self):
-        self.edit_field = EditFieldWindow(self)
+        if self.edit_field is None:
+            self.edit_field = EditFieldWindow(self)
+        self.edit_field.load_field()
         self.hide()
+        center_window(self.edit_field)
         self.edit_field.show()
     
     def delete_field(self):
         selected = self.fieldsList.selectedItems()[0]
         selected_index = self.fieldsList.row(selected)
-        self.fields.pop(selected_index)
+        self.update_fields_length(-field_length(self.fields.pop(selected_index)))
         self.fieldsList.clear()
         self.fieldsList.addItems([field['name'] for field in self.fields])
     
     def closeEvent(self,event):
+        self.webhook_window.open_editor = None
+        self.webhook_window.schedule_autosave()
         self.webhook_window.show()
 
     def color_dialog(self):
@@ -311,65 +949,73 @@ class EmbedWindow(QWidget, Ui_Embed):
         )
 
     def add_embed(self):
-
-        if len(self.webhook_window.embeds)>=10:
+        errors = limit_errors(self.part_lengths, self.fields, self.embed_length)
+        if errors:
+            self.nonCriticalError.setText('\n'.join(errors))
+            self.nonCriticalError.exec()
+        elif any(
+            [
+                self.authorInput.text(),
+                self.embedTitle.text(),
+                self.embedDescription.toPlainText(),
+                self.fields,
+                self.imageInput.text(),
+                self.thumbnailInput.text(),
+                self.footerInput.text()
+            ]
+        ):
+            embed_dict = embed_dict_creation(
+                self.authorInput.text(),
+                self.authorURL.text(),
+                self.authorIconURL.text(),
+                self.embedTitle.text(),
+                self.embedDescription.toPlainText(),
+                self.embedURL.text(),
+                self.colorInput.text(),
+                self.fields,
+                self.imageInput.text(),
+                self.thumbnailInput.text(),
+                self.footerInput.text(),
+                self.timestampCheckbox.isChecked(),
+                self.footerIconURL.text()
+            )
+            embed = embed_creation(embed_dict)
+            self.webhook_window.embeds.append(embed)
+            self.webhook_window.update_embeds_length(self.embed_length)
+            self.webhook_window.embedsList.clear()
+            # self.webhook_window.embedsList.addItems([item.title for item in self.webhook_window.embeds])
+            self.webhook_window.embedsList.addItems([f'Embed:{i+1}' for i in range(len(self.webhook_window.embeds))])
+            self.close()
+        else:
             self.nonCriticalError.setText(
-                "You have reached the limit of Embeds Allowed"
+                "You must fill at least one of the following fields: Autor, Title, Description, Fields, Footer or Image."
             )
             self.nonCriticalError.exec()
-        else:
-            if any(
-                [
-                    self.authorInput.text(),
-                    self.embedTitle.text(),
-                    self.embedDescription.toPlainText(),
-                    self.fields,
-                    self.imageInput.text(),
-                    self.thumbnailInput.text(),
-                    self.footerInput.text()
-                ]
-            ):
-                embed_dict = embed_dict_creation(
-                    self.authorInput.text(),
-                    self.authorURL.text(),
-                    self.authorIconURL.text(),
-                    self.embedTitle.text(),
-                    self.embedDescription.toPlainText(),
-                    self.embedURL.text(),
-                    self.colorInput.text(),
-                    self.fields,
-                    self.imageInput.text(),
-                    self.thumbnailInput.text(),
-                    self.footerInput.text(),
-                    self.timestampCheckbox.isChecked(),
-                    self.footerIconURL.text()
-                )
-                embed = embed_creation(embed_dict)
-                self.webhook_window.embeds.append(embed)
-                self.webhook_window.embedsList.clear()
-                # self.webhook_window.embedsList.addItems([item.title for item in self.webhook_window.embeds])
-                self.webhook_window.embedsList.addItems([f'Embed:{i+1}' for i in range(len(self.webhook_window.embeds))])
-                self.close()
-            else:
-                self.nonCriticalError.setText(
-                    "You must fill at least one of the following fields: Autor, Title, Description, Fields, Footer or Image."
-                )
-                self.nonCriticalError.exec()
 
 class EditEmbedWindow(EmbedWindow):
     def __init__(self, main_window):
         super().__init__(main_window)
         self.main_window = main_window
-        self.embed_list = self.main_window.embeds
         self.setWindowTitle('Edit Embed')
         self.editEmbed = QPushButton('Edit Embed')
         self.addEmbed.setVisible(False)
         self.editEmbed.clicked.connect(self.edit_embed)
         self.mainVerticalLayout.addWidget(self.editEmbed)
+        self.editSentMessage = QPushButton('Edit Sent Message')
+        self.editSentMessage.clicked.connect(self.edit_sent_message)
+        self.mainVerticalLayout.addWidget(self.editSentMessage)
+
+    def load_embed(self):
         selected_item = self.webhook_window.embedsList.selectedItems()[0]
         self.selected_index = self.webhook_window.embedsList.row(selected_item)
-        self.embed = self.embed_list[self.selected_index]
-        self.fields = self.embed.fields
+        # Read through the window every time, load_message replaces the list.
+        self.embed = self.webhook_window.embeds[self.selected_index]
+        self.reset()
+        self.editSentMessage.setVisible(self.embed in self.webhook_window.sent_embeds)
+        self.original_length = embed_length(self.embed)
+        # A copy, so nothing reaches the stored embed until the edit is confirmed.
+        self.fields = [dict(field) for field in self.embed.fields]
+        self.update_fields_length(sum(field_length(field) for field in self.fields))
         self.authorInput.setText(self.embed.author['name'])
         self.authorURL.setText(self.embed.author['url'])
         self.authorIconURL.setText(self.embed.author['icon_url'])
@@ -389,20 +1035,15 @@ class EditEmbedWindow(EmbedWindow):
         if self.embed.timestamp:
             self.timestampCheckbox.setChecked(True)
         self.footerIconURL.setText(self.embed.footer['icon_url'])
-        self.fieldsList.selectionModel().selectionChanged.connect(self.field_selected)
-
-    def field_selected(self,e):
-        if len(self.embed.fields)>0:
-            if not self.editFieldButton.isEnabled():
-                self.editFieldButton.setEnabled(True)
-            if not self.deleteFieldButton.isEnabled():
-                self.deleteFieldButton.setEnabled(True)
-        else:
-            self.editFieldButton.setDisabled(True)
-            self.deleteFieldButton.setDisabled(True)
+        self.update_size_label()
+        self.undo_stack.reset(self.draft_state())
 
     def edit_embed(self):
-        if any(
+        errors = limit_errors(self.part_lengths, self.fields, self.embed_length)
+        if errors:
+            self.nonCriticalError.setText('\n'.join(errors))
+            self.nonCriticalError.exec()
+        elif any(
                 [
                     self.authorInput.text(),
                     self.embedTitle.text(),
@@ -431,6 +1072,7 @@ class EditEmbedWindow(EmbedWindow):
             embed = embed_creation(embed_dict)
             self.webhook_window.embeds.pop(self.selected_index)
             self.webhook_window.embeds.insert(self.selected_index, embed)
+            self.webhook_window.update_embeds_length(self.embed_length - self.original_length)
             self.webhook_window.embedsList.clear()
             self.webhook_window.embedsList.addItems(
               [f"Embed: {i+1}" for i in range(len(self.webhook_window.embeds))]  
@@ -442,7 +1084,21 @@ class EditEmbedWindow(EmbedWindow):
             )
             self.nonCriticalError.exec()
 
+    def draft_state(self):
+        return {**super().draft_state(), 'index': self.selected_index}
+
+    def edit_sent_message(self):
+        record, position = self.webhook_window.sent_embeds.pop(self.embed)
+        self.edit_embed()
+        embed = self.webhook_window.embeds[self.selected_index]
+        self.webhook_window.sent_embeds[embed] = (record, position)
+        if embed is not self.embed:
+            record['embeds'][position] = embed
+            self.webhook_window.edit_sent_worker(record)
+
     def closeEvent(self, event):
+        self.main_window.open_editor = None
+        self.main_window.schedule_autosave()
         self.main_window.show()
 
 class FieldWindow(QWidget, Ui_Field):
@@ -454,8 +1110,45 @@ class FieldWindow(QWidget, Ui_Field):
         self.fieldErrorMessage = QMessageBox()
         self.fieldErrorMessage.setIcon(QMessageBox.Warning)
         self.fieldErrorMessage.setWindowTitle('Error')
+        self.original_length = 0
+        self.sizeLabel = QLabel(self)
+        self.verticalLayout.insertWidget(
+            self.verticalLayout.indexOf(self.addField), self.sizeLabel
+        )
 
         self.addField.clicked.connect(self.add_field)
+        self.nameInput.textChanged.connect(self.update_size_label)
+        self.valueInput.textChanged.connect(self.update_size_label)
+        self.update_size_label()
+
+    def reset(self):
+        self.nameInput.clear()
+        self.valueInput.clear()
+        self.inlineCheckbox.setChecked(True)
+        self.original_length = 0
+        self.update_size_label()
+
+    def new_embed_length(self):
+        return (
+            self.embed_window.embed_length - self.original_length
+            + len(self.nameInput.text()) + len(self.valueInput.text())
+        )
+
+    def update_size_label(self):
+        length = self.new_embed_length()
+        self.sizeLabel.setText(f'Embed: {length}/{EMBED_TOTAL_LIMIT}')
+        self.sizeLabel.setStyleSheet(
+            'color:red;' if length > EMBED_TOTAL_LIMIT else ''
+        )
+
+    def check_embed_length(self):
+        if self.new_embed_length() > EMBED_TOTAL_LIMIT:
+            self.fieldErrorMessage.setText(
+                f"The Embed would exceed {EMBED_TOTAL_LIMIT} characters"
+            )
+            self.fieldErrorMessage.exec()
+            return False
+        return True
     
     def add_field(self):
         if len(self.embed_window.fields)>=25:
@@ -463,7 +1156,7 @@ class FieldWindow(QWidget, Ui_Field):
                 "You have been reached the limit amount of fields per Embed"
             ) 
             self.fieldErrorMessage.exec()
-        else:
+        elif self.check_embed_length():
             if all([
                 self.nameInput.text(),
                 self.valueInput.text()
@@ -476,6 +1169,7 @@ class FieldWindow(QWidget, Ui_Field):
                 self.embed_window.fields.append(
                     field_dict
                 ) 
+                self.embed_window.update_fields_length(field_length(field_dict))
                 self.embed_window.fieldsList.clear()
                 self.embed_window.fieldsList.addItems([i['name'] for i in self.embed_window.fields])
                 self.close()
@@ -494,17 +1188,23 @@ class EditFieldWindow(FieldWindow):
         self.embed_window = embed_window
         self.setWindowTitle('Edit Field')
         self.editField = QPushButton('Edit Field')
+        self.addField.setVisible(False)
+        self.verticalLayout.addWidget(self.editField)
+        self.editField.clicked.connect(self.edit_field)
+
+    def load_field(self):
         selected_item = self.embed_window.fieldsList.selectedItems()[0]
         self.selected_index = self.embed_window.fieldsList.row(selected_item)
         field = self.embed_window.fields[self.selected_index]
+        self.original_length = field_length(field)
         self.nameInput.setText(field['name'])
         self.valueInput.setText(field['value'])
         self.inlineCheckbox.setChecked(field['inline'])
-        self.addField.setVisible(False)
-        self.verticalLayout.addWidget(self.editField)
-        self.editField.clicked.connect(self.edit_field)
+        self.update_size_label()
 
     def edit_field(self):
+        if not self.check_embed_length():
+            return
         item = {
             'name':self.nameInput.text(),
             'value':self.valueInput.text(),
@@ -512,6 +1212,7 @@ class EditFieldWindow(FieldWindow):
         }
         self.embed_window.fields.pop(self.selected_index)
         self.embed_window.fields.insert(self.selected_index, item)
+        self.embed_window.update_fields_length(field_length(item) - self.original_length)
         self.embed_window.fieldsList.clear()
         self.embed_window.fieldsList.addItems(
             [item['name'] for item in self.embed_window.fields]
@@ -521,9 +1222,122 @@ class EditFieldWindow(FieldWindow):
     def closeEvent(self, event):
         self.embed_window.show()
 
+class HistoryModel(QAbstractTableModel):
+    '''
+    Table model that pages through the history as the view scrolls.
+    '''
+    headers = ['Sent', 'Status', 'Webhook', 'Content']
+    page_size = 200
+
+    def __init__(self, history):
+        super().__init__()
+        self.history = history
+        self.query = ''
+        self.rows = []
+        self.exhausted = False
+
+    def set_query(self, query):
+        self.beginResetModel()
+        self.query = query
+        self.rows = []
+        self.exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        id, message_id, webhook, sent_at, status, content = self.rows[index.row()]
+        return [
+            datetime.fromtimestamp(sent_at).strftime('%Y-%m-%d %H:%M'),
+            status,
+            str(webhook_id(webhook)),
+            content.replace('\n', ' ')[:100],
+        ][index.column()]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        before = self.rows[-1][0] if self.rows else None
+        rows = self.history.page(before, self.page_size, self.query)
+        self.exhausted = len(rows) < self.page_size
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+class HistoryWindow(QWidget):
+    def __init__(self, webhook_window):
+        super().__init__()
+        self.webhook_window = webhook_window
+        self.setWindowTitle('History')
+        self.resize(640, 480)
+        center_window(self)
+        self.model = HistoryModel(webhook_window.history)
+        self.searchInput = QLineEdit()
+        self.searchInput.setPlaceholderText('Search content, titles, descriptions and fields')
+        self.searchInput.setClearButtonEnabled(True)
+        self.messagesTable = QTableView()
+        self.messagesTable.setModel(self.model)
+        self.messagesTable.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.messagesTable.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.messagesTable.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.loadButton = QPushButton('Load into Composer')
+        self.loadButton.setDisabled(True)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.searchInput)
+        layout.addWidget(self.messagesTable)
+        layout.addWidget(self.loadButton)
+        # Searching waits for a pause in typing instead of querying every key.
+        self.searchTimer = QTimer(self)
+        self.searchTimer.setSingleShot(True)
+        self.searchTimer.setInterval(300)
+        self.searchTimer.timeout.connect(self.search)
+        self.searchInput.textChanged.connect(self.searchTimer.start)
+        self.messagesTable.selectionModel().selectionChanged.connect(self.message_selected)
+        self.messagesTable.doubleClicked.connect(self.load_message)
+        self.loadButton.clicked.connect(self.load_message)
+
+    def showEvent(self, event):
+        self.search()
+
+    def search(self):
+        self.model.set_query(self.searchInput.text())
+
+    def message_selected(self, e):
+        self.loadButton.setEnabled(self.messagesTable.selectionModel().hasSelection())
+
+    def load_message(self):
+        rows = self.messagesTable.selectionModel().selectedRows()
+        if not rows:
+            return
+        payload = self.model.history.payload(self.model.rows[rows[0].row()][0])
+        self.webhook_window.load_message(
+            payload.get('content', ''),
+            [embed_creation(embed_dict_from_payload(embed)) for embed in payload.get('embeds', [])],
+        )
+        self.close()
+        self.webhook_window.show()
+        self.webhook_window.raise_()
+
 
-app = QApplication(sys.argv)
-app.setStyle('Fusion')
-main_window = WebHookWindow()
+if __name__ == '__main__':
+    app = QApplication(sys.argv)
+    app.setStyle('Fusion')
+    main_window = WebHookWindow()
+    main_window.listen_for_handoff()
+    main_window.handoff(request)
 
-app.exec()
\ No newline at end of file
+    app.exec()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import os
+import sys
+import ctypes
+import pytest
+
+# The modules import each other by flat name, as they do when run from their folder.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'discord_webhooks_gui'))
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    # A composer window on an offscreen display, with its data in tmp_path.
+    monkeypatch.setenv('QT_QPA_PLATFORM', 'offscreen')
+    QtWidgets = pytest.importorskip('PySide6.QtWidgets')
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.chdir(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'discord_webhooks_gui'))
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    # Some PySide6 wheels drop a reference to None on every void call. Before
+    # 3.12 None is not immortal, so what the test took is handed back or the
+    # interpreter frees None on exit.
+    none_references = sys.getrefcount(None)
+    import webhooks
+    window = webhooks.WebHookWindow()
+    window.error.exec = lambda: None
+    yield window
+    window.autosaveTimer.stop()
+    window.close()
+    app.processEvents()
+    if sys.version_info < (3, 12):
+        for _ in range(none_references - sys.getrefcount(None)):
+            ctypes.pythonapi.Py_IncRef(ctypes.py_object(None))
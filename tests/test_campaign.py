@@ -0,0 +1,23 @@
+import io
+from queue import Queue
+from campaign import Progress
+
+def lane(depth, granted, mean_wait, max_wait):
+    return {'depth': depth, 'granted': granted, 'mean_wait': mean_wait, 'max_wait': max_wait}
+
+def test_lane_stats_are_summed_across_shards(tmp_path):
+    results = Queue()
+    results.put((0, 'lanes', {'bulk': lane(2, 10, 0.1, 0.5), 'alert': lane(0, 0, 0.0, 0.0)}))
+    results.put((1, 'lanes', {'bulk': lane(0, 30, 0.2, 0.3), 'alert': lane(0, 0, 0.0, 0.0)}))
+    results.put((0, 'sent', None))
+    results.put(None)
+    results.put(None)
+    out = io.StringIO()
+    progress = Progress(2, str(tmp_path / 'parked'), out)
+    progress.collect(results)
+    bulk = progress.lane_stats()['bulk']
+    assert (bulk['depth'], bulk['granted'], bulk['max_wait']) == (2, 40, 0.5)
+    assert abs(bulk['mean_wait'] - 0.175) < 1e-9
+    assert progress.sent == 1
+    assert 'bulk: 40 requests  2 waiting' in out.getvalue()
+    assert 'alert' not in out.getvalue()
@@ -0,0 +1,77 @@
+import time
+import pytest
+import core
+
+QtWidgets = pytest.importorskip('PySide6.QtWidgets')
+
+WEBHOOK = 'https://discord.com/api/webhooks/1/' + 'a' * 68
+
+def wait_for(condition, timeout=2):
+    app = QtWidgets.QApplication.instance()
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+def test_send_is_enabled_again_after_the_breaker_cools_down(window, monkeypatch):
+    breaker = core.CircuitBreaker(cooldown=0.1)
+    monkeypatch.setattr(core, 'breakers', {1: breaker})
+    window.webhookInput.blockSignals(True)
+    window.webhookInput.setText(WEBHOOK)
+    window.webhook_request_status = True
+    window.content.setPlainText('hi')
+    for _ in range(core.FAILURE_THRESHOLD):
+        breaker.failure('HTTP 502')
+    window.update_webhook_state()
+    assert not window.sendButton.isEnabled()
+    assert window.webhookStateLabel.text() == 'Unavailable: HTTP 502'
+    assert wait_for(window.sendButton.isEnabled)
+    assert window.webhookStateLabel.text().startswith('Retrying')
+
+def press(widget, key, modifiers):
+    from PySide6.QtTest import QTest
+    app = QtWidgets.QApplication.instance()
+    widget.window().activateWindow()
+    widget.setFocus()
+    app.processEvents()
+    QTest.keyClick(widget, key, modifiers)
+    app.processEvents()
+
+def test_undo_keys_reach_the_window_from_a_focused_input(window):
+    from PySide6.QtCore import Qt
+    window.load_message('', [core.embed_creation(core.embed_dict_from_payload({'title': 'x'}))])
+    window.autosave()
+    press(window.content, Qt.Key_Z, Qt.ControlModifier)
+    assert window.embeds == []
+    press(window.usernameInput, Qt.Key_Z, Qt.ControlModifier | Qt.ShiftModifier)
+    assert len(window.embeds) == 1
+
+def test_undo_keys_reach_the_embed_editor_from_a_focused_input(window):
+    from PySide6.QtCore import Qt
+    window.add_embed_window()
+    editor = window.embed_window
+    editor.fields = [core.field_dict_creation('name', 'value', False)]
+    editor.fieldsList.addItem('name')
+    window.autosave()
+    press(editor.embedTitle, Qt.Key_Z, Qt.ControlModifier)
+    assert editor.fields == [] and editor.fieldsList.count() == 0
+    press(editor.embedDescription, Qt.Key_Y, Qt.ControlModifier)
+    assert editor.fieldsList.count() == 1
+    editor.close()
+
+def test_undo_keeps_a_pasted_attachment(window):
+    from PySide6.QtCore import QMimeData
+    from PySide6.QtGui import QImage, QColor
+    image = QImage(8, 8, QImage.Format_RGB32)
+    image.fill(QColor('red'))
+    mime = QMimeData()
+    mime.setImageData(image)
+    assert window.attach_mime_data(mime)
+    window.content.setPlainText('first')
+    window.autosave()
+    window.content.setPlainText('second')
+    window.autosave()
+    window.undo()
+    assert window.content.toPlainText() == 'first'
+    assert window.current_attachment() is not None
@@ -0,0 +1,48 @@
+import time
+import threading
+import pytest
+from dispatch import Dispatcher
+
+def test_unknown_lanes_are_rejected():
+    with pytest.raises(ValueError):
+        Dispatcher().acquire('urgent')
+
+def test_rate_limits_requests():
+    dispatcher = Dispatcher(rate=50)
+    started = time.monotonic()
+    for _ in range(60):
+        dispatcher.acquire('bulk')
+    # The bucket starts full, the other 10 slots take 0.2 s to refill.
+    assert time.monotonic() - started >= 0.15
+    assert dispatcher.stats()['bulk']['granted'] == 60
+
+class RecordingDispatcher(Dispatcher):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.order = []
+
+    def grant(self, lane):
+        self.order.append(lane)
+        super().grant(lane)
+
+def test_waiting_lanes_are_served_by_weight():
+    # Too slow to grant anything while the lanes fill up.
+    dispatcher = RecordingDispatcher(rate=0.001, weights={'interactive': 3, 'bulk': 1})
+    threads = [
+        threading.Thread(target=dispatcher.acquire, args=(lane,))
+        for lane in ['bulk'] * 4 + ['interactive'] * 12
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while dispatcher.stats()['bulk']['depth'] + dispatcher.stats()['interactive']['depth'] < 16:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    with dispatcher.condition:
+        dispatcher.rate = 1000
+        dispatcher.condition.notify_all()
+    for thread in threads:
+        thread.join()
+    # Every four slots go three to interactive and one to bulk.
+    for start in range(0, 16, 4):
+        assert sorted(dispatcher.order[start:start + 4]) == ['bulk'] + ['interactive'] * 3
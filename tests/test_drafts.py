@@ -0,0 +1,36 @@
+from drafts import DraftJournal
+
+def journal_lines(journal):
+    with open(journal.journal_path, encoding='utf-8') as file:
+        return file.read().splitlines()
+
+def test_round_trip(tmp_path):
+    journal = DraftJournal(str(tmp_path / 'draft'))
+    journal.save({'content': 'hi', 'embeds': 0})
+    assert DraftJournal(str(tmp_path / 'draft')).load() == {'content': 'hi', 'embeds': 0}
+
+def test_only_changed_keys_are_appended(tmp_path):
+    journal = DraftJournal(str(tmp_path / 'draft'))
+    journal.save({'content': 'hi', 'username': 'bot'})
+    journal.save({'content': 'hello', 'username': 'bot'})
+    journal.save({'content': 'hello', 'username': 'bot'})
+    assert journal_lines(journal) == [
+        '{"content": "hi", "username": "bot"}',
+        '{"content": "hello"}',
+    ]
+
+def test_compaction_folds_the_journal_into_the_snapshot(tmp_path):
+    journal = DraftJournal(str(tmp_path / 'draft'), compact_every=3)
+    for index in range(4):
+        journal.save({'content': str(index)})
+    assert journal_lines(journal) == ['{"content": "3"}']
+    assert DraftJournal(str(tmp_path / 'draft')).load() == {'content': '3'}
+
+def test_a_torn_last_line_is_dropped(tmp_path):
+    journal = DraftJournal(str(tmp_path / 'draft'))
+    journal.save({'content': 'kept'})
+    with open(journal.journal_path, 'a', encoding='utf-8') as file:
+        file.write('{"content": "cut sh')
+    restored = DraftJournal(str(tmp_path / 'draft'))
+    assert restored.load() == {'content': 'kept'}
+    assert journal_lines(restored) == []
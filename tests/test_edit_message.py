@@ -0,0 +1,51 @@
+import copy
+import pytest
+import core
+from core import edit_message, embed_creation, embed_dict_from_payload, message_payload
+
+@pytest.fixture
+def requests_made(monkeypatch):
+    made = []
+    monkeypatch.setattr(
+        core, 'webhook_request',
+        lambda transport, method, url, payload, file=None, lane='bulk': made.append((method, url, payload)),
+    )
+    monkeypatch.setattr(core, 'get_transport', lambda: None)
+    return made
+
+def sent_record(content, embeds):
+    return {
+        'id': '1',
+        'webhook': 'https://discord.com/api/webhooks/1/token',
+        'payload': copy.deepcopy(message_payload(content, embeds)),
+        'embeds': list(embeds),
+    }
+
+def make_embed(title):
+    return embed_creation(embed_dict_from_payload({'title': title}))
+
+def test_unchanged_message_sends_nothing(requests_made):
+    record = sent_record('hi', [make_embed('a')])
+    assert edit_message(record) == {}
+    assert requests_made == []
+
+def test_only_changed_embeds_are_patched(requests_made):
+    record = sent_record('hi', [make_embed('a')])
+    record['embeds'][0] = make_embed('b')
+    changes = edit_message(record)
+    assert list(changes) == ['embeds']
+    method, url, payload = requests_made[0]
+    assert (method, url) == ('PATCH', 'https://discord.com/api/webhooks/1/token/messages/1')
+    assert payload['embeds'][0]['title'] == 'b'
+    assert record['payload']['embeds'][0]['title'] == 'b'
+
+def test_new_content_is_patched(requests_made):
+    record = sent_record('hi', [make_embed('a')])
+    assert edit_message(record, content='hello') == {'content': 'hello'}
+    assert record['payload']['content'] == 'hello'
+    assert edit_message(record, content='hello') == {}
+
+def test_content_over_the_limit_is_refused(requests_made):
+    with pytest.raises(Exception):
+        edit_message(sent_record('hi', []), content='x' * 2001)
+    assert requests_made == []
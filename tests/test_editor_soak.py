@@ -0,0 +1,64 @@
+import os
+import time
+import pytest
+
+QtWidgets = pytest.importorskip('PySide6.QtWidgets')
+
+from core import embed_creation, embed_dict_from_payload
+
+CYCLES = 300
+
+def rss_kb():
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+def make_embeds(title):
+    return [embed_creation(embed_dict_from_payload({
+        'title': title,
+        'description': 'description',
+        'fields': [{'name': 'name', 'value': 'value'}],
+    }))]
+
+def open_editors(window, title):
+    window.embedsList.setCurrentRow(0)
+    window.edit_embed_window()
+    editor = window.edit_window
+    assert editor.embedTitle.text() == title
+    editor.fieldsList.setCurrentRow(0)
+    editor.edit_field_window()
+    assert editor.edit_field.nameInput.text() == 'name'
+    editor.edit_field.close()
+    editor.close()
+    window.add_embed_window()
+    window.embed_window.add_field_window()
+    window.embed_window.field_window.close()
+    window.embed_window.close()
+
+def test_editor_reopens_after_load_message(window):
+    window.load_message('', make_embeds('first'))
+    open_editors(window, 'first')
+    editor = window.edit_window
+    window.load_message('', make_embeds('second'))
+    open_editors(window, 'second')
+    assert window.edit_window is editor
+    editor.embedTitle.setText('edited')
+    editor.edit_embed()
+    assert window.embeds[0].title == 'edited'
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason='reads RSS from /proc')
+def test_reopening_editors_stays_fast_and_flat(window):
+    app = QtWidgets.QApplication.instance()
+    samples = []
+    for cycle in range(CYCLES):
+        if cycle == CYCLES // 3:
+            baseline = rss_kb()
+        title = f'embed {cycle}'
+        started = time.perf_counter()
+        window.load_message('', make_embeds(title))
+        open_editors(window, title)
+        app.processEvents()
+        samples.append(time.perf_counter() - started)
+    first = sorted(samples[10:60])[25]
+    last = sorted(samples[-50:])[25]
+    assert last < first * 3 + 0.005
+    assert rss_kb() - baseline < 16 * 1024
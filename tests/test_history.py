@@ -0,0 +1,75 @@
+import pytest
+from history import History, fts_query
+
+@pytest.fixture
+def history(tmp_path):
+    return History(str(tmp_path / 'history.sqlite3'))
+
+def payload(content, title='', description='', field_value=''):
+    embed = {'title': title, 'description': description, 'fields': []}
+    if field_value:
+        embed['fields'].append({'name': 'n', 'value': field_value})
+    return {'content': content, 'embeds': [embed]}
+
+def all_pages(history, query='', limit=200):
+    pages = []
+    before = None
+    while True:
+        rows = history.page(before, limit, query)
+        if not rows:
+            return pages
+        pages.append(rows)
+        before = rows[-1][0]
+
+def test_paging_covers_every_row_once_newest_first(history):
+    for index in range(450):
+        history.record('hook', payload(f'message {index}'), 'sent', str(index))
+    pages = all_pages(history)
+    assert [len(page) for page in pages] == [200, 200, 50]
+    ids = [row[0] for page in pages for row in page]
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 450
+    assert pages[0][0][5] == 'message 449'
+    assert pages[-1][-1][5] == 'message 0'
+
+def test_search_pages_through_matches_only(history):
+    for index in range(500):
+        history.record('hook', payload(f'{"deploy" if index % 2 else "backup"} {index}'), 'sent')
+    pages = all_pages(history, 'deploy')
+    assert [len(page) for page in pages] == [200, 50]
+    assert all(row[5].startswith('deploy') for page in pages for row in page)
+    assert len({row[0] for page in pages for row in page}) == 250
+
+def test_search_matches_prefixes_and_embed_text(history):
+    history.record('hook', payload('', title='Nightly release'), 'sent')
+    history.record('hook', payload('', description='disk almost full'), 'sent')
+    history.record('hook', payload('', field_value='latency 250ms'), 'failed')
+    assert len(history.page(query='rel')) == 1
+    assert len(history.page(query='disk ful')) == 1
+    assert history.page(query='latency')[0][4] == 'failed'
+    assert history.page(query='missing') == []
+
+def test_search_rows_join_the_right_message(history):
+    history.record('hook', payload('alpha'), 'sent', 'a')
+    history.record('other', payload('beta'), 'sent', 'b')
+    (row,) = history.page(query='beta')
+    assert row[1:3] == ('b', 'other')
+    assert history.payload(row[0])['content'] == 'beta'
+
+@pytest.mark.parametrize('query', [
+    '"', '""', '*', 'a OR', 'NOT', 'content:x', '(', ')', 'NEAR(a b)', "'; DROP TABLE messages; --",
+    '^start', 'a AND', '-x', '"unbalanced', 'x"y',
+])
+def test_hostile_queries_are_taken_literally(history, query):
+    history.record('hook', payload('plain text'), 'sent')
+    history.record('hook', payload(f'quoted {query} here'), 'sent')
+    rows = history.page(query=query)
+    assert all(row[5] != 'plain text' for row in rows)
+    assert len(history.page()) == 2
+
+def test_operators_are_searched_as_words(history):
+    history.record('hook', payload('this OR that'), 'sent')
+    history.record('hook', payload('this'), 'sent')
+    assert [row[5] for row in history.page(query='this OR')] == ['this OR that']
+
+def test_fts_query_quotes_every_word():
+    assert fts_query('say "hi" now') == '"say"* """hi"""* "now"*'
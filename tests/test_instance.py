@@ -0,0 +1,40 @@
+import os
+import socket
+import pytest
+from instance import server_name, forward_to_running, stale_server, launch_request
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv('HOME', str(tmp_path))
+    os.makedirs(os.path.dirname(server_name()))
+    return tmp_path
+
+def listening_socket():
+    server = socket.socket(socket.AF_UNIX)
+    server.bind(server_name())
+    server.listen()
+    return server
+
+def test_a_socket_left_by_a_crash_is_stale(home):
+    socket.socket(socket.AF_UNIX).bind(server_name())
+    assert stale_server()
+
+def test_a_busy_instance_is_not_stale(home):
+    with listening_socket():
+        # It never answers, so the handoff times out, but the socket is live.
+        assert not forward_to_running(launch_request([]), timeout=0.2)
+        assert not stale_server(timeout=0.2)
+
+def test_a_second_window_leaves_a_live_instance_alone(home, window):
+    with listening_socket() as server:
+        window.listen_for_handoff()
+        assert not window.instanceServer.isListening()
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(server_name())
+            server.accept()[0].close()
+
+def test_a_window_takes_over_a_stale_socket(home, window):
+    socket.socket(socket.AF_UNIX).bind(server_name())
+    window.listen_for_handoff()
+    assert window.instanceServer.isListening()
+    window.instanceServer.close()
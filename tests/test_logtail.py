@@ -0,0 +1,51 @@
+import os
+import pytest
+
+pytest.importorskip('PySide6.QtCore')
+
+from logtail import TailedFile, pack_fields, FIELDS_PER_EMBED
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(text)
+
+def test_only_appended_lines_are_read(tmp_path):
+    path = tmp_path / 'app.log'
+    append(path, 'old\n')
+    tail = TailedFile(str(path))
+    append(path, 'one\ntwo\r\n')
+    assert tail.read_lines() == ['one', 'two']
+    assert tail.read_lines() == []
+
+def test_a_partial_line_waits_for_its_end(tmp_path):
+    path = tmp_path / 'app.log'
+    append(path, '')
+    tail = TailedFile(str(path))
+    append(path, 'half')
+    assert tail.read_lines() == []
+    append(path, ' done\n')
+    assert tail.read_lines() == ['half done']
+
+def test_rotation_drains_the_old_file_then_reads_the_new_one(tmp_path):
+    path = tmp_path / 'app.log'
+    append(path, '')
+    tail = TailedFile(str(path))
+    append(path, 'last of old\n')
+    os.rename(path, tmp_path / 'app.log.1')
+    assert tail.read_lines() == ['last of old']
+    append(path, 'first of new\n')
+    assert tail.read_lines() == ['first of new']
+
+def test_truncation_starts_over(tmp_path):
+    path = tmp_path / 'app.log'
+    append(path, '')
+    tail = TailedFile(str(path))
+    append(path, 'a long line before truncation\n')
+    assert tail.read_lines() == ['a long line before truncation']
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('new\n')
+    assert tail.read_lines() == ['new']
+
+def test_fields_are_packed_25_to_an_embed():
+    embeds = pack_fields('log', [f'line {index}' for index in range(FIELDS_PER_EMBED + 1)])
+    assert [len(embed.fields) for embed in embeds] == [FIELDS_PER_EMBED, 1]
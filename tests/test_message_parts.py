@@ -0,0 +1,86 @@
+from core import (
+    split_content,
+    chunk_embeds,
+    message_parts,
+    embed_length,
+    embed_limit_errors,
+    embed_creation,
+    embed_dict_from_payload,
+    CONTENT_LIMIT,
+    EMBEDS_PER_MESSAGE,
+    EMBED_TOTAL_LIMIT,
+)
+
+def make_embed(description='', title='', fields=()):
+    return embed_creation(embed_dict_from_payload({
+        'title': title,
+        'description': description,
+        'fields': [{'name': name, 'value': value} for name, value in fields],
+    }))
+
+def test_short_content_is_one_chunk():
+    assert split_content('hello') == ['hello']
+
+def test_split_prefers_line_breaks():
+    first = 'a' * 1500
+    second = 'b' * 1500
+    assert split_content(f'{first}\n{second}') == [first, second]
+
+def test_split_falls_back_to_spaces():
+    words = ' '.join(['word'] * 1000)
+    chunks = split_content(words)
+    assert all(len(chunk) <= CONTENT_LIMIT for chunk in chunks)
+    assert ' '.join(chunks) == words
+
+def test_split_cuts_inside_a_word_only_when_needed():
+    chunks = split_content('x' * 4500)
+    assert [len(chunk) for chunk in chunks] == [2000, 2000, 500]
+
+def test_split_drops_blank_chunks():
+    assert split_content('a' * 2000 + '\n' + ' ' * 10) == ['a' * 2000]
+
+def test_chunk_embeds_respects_the_count_limit():
+    embeds = [make_embed('x') for _ in range(EMBEDS_PER_MESSAGE + 3)]
+    chunks = chunk_embeds(embeds)
+    assert [len(chunk) for chunk in chunks] == [EMBEDS_PER_MESSAGE, 3]
+
+def test_chunk_embeds_respects_the_total_length():
+    embeds = [make_embed('x' * 4000) for _ in range(3)]
+    chunks = chunk_embeds(embeds)
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+    assert all(
+        sum(embed_length(embed) for embed in chunk) <= EMBED_TOTAL_LIMIT
+        for chunk in chunks
+    )
+
+def test_embeds_ride_on_the_last_content_part():
+    embed = make_embed('x')
+    parts = message_parts('a' * 2500, [embed])
+    assert [part['content'] for part in parts] == ['a' * 2000, 'a' * 500]
+    assert parts[0]['embeds'] == []
+    assert parts[1]['embeds'] == [embed]
+
+def test_extra_embed_chunks_get_their_own_parts():
+    embeds = [make_embed('x') for _ in range(EMBEDS_PER_MESSAGE + 1)]
+    parts = message_parts('hi', embeds)
+    assert [(part['content'], len(part['embeds'])) for part in parts] == [
+        ('hi', EMBEDS_PER_MESSAGE), ('', 1),
+    ]
+
+def test_empty_message_is_one_empty_part():
+    assert message_parts('', []) == [{'content': '', 'embeds': []}]
+
+def test_embed_length_counts_text_and_fields():
+    embed = make_embed('abc', title='de', fields=[('f', 'gh')])
+    assert embed_length(embed) == 8
+
+def test_embed_limit_errors():
+    assert embed_limit_errors(make_embed('x' * 100)) == []
+    errors = embed_limit_errors(make_embed('x' * 4097, title='t' * 257))
+    assert 'Title exceeds 256 characters' in errors
+    assert 'Description exceeds 4096 characters' in errors
+    errors = embed_limit_errors(make_embed(fields=[('n' * 257, 'v' * 1025)]))
+    assert 'Field name exceeds 256 characters' in errors
+    assert 'Field value exceeds 1024 characters' in errors
+    errors = embed_limit_errors(make_embed('x' * 4000, fields=[('n', 'v' * 1000)] * 3))
+    assert f'Embed exceeds {EMBED_TOTAL_LIMIT} characters' in errors
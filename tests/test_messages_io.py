@@ -0,0 +1,31 @@
+import json
+from messages_io import iter_messages
+
+def write_lines(path, values):
+    path.write_text(''.join(json.dumps(value) + '\n' for value in values), encoding='utf-8')
+
+def test_jsonl_of_bare_embeds(tmp_path):
+    embeds = [{'title': 'one'}, {'description': 'two', 'color': 255}]
+    write_lines(tmp_path / 'embeds.jsonl', embeds)
+    with open(tmp_path / 'embeds.jsonl', encoding='utf-8') as file:
+        messages = list(iter_messages(file))
+    assert messages == [{'content': '', 'embeds': [embed]} for embed in embeds]
+
+def test_a_single_bare_embed(tmp_path):
+    (tmp_path / 'embed.json').write_text('{"title": "only", "fields": []}', encoding='utf-8')
+    with open(tmp_path / 'embed.json', encoding='utf-8') as file:
+        messages = list(iter_messages(file))
+    assert messages == [{'content': '', 'embeds': [{'title': 'only', 'fields': []}]}]
+
+def test_payload_embeds_are_not_repeated(tmp_path):
+    write_lines(tmp_path / 'payloads.jsonl', [
+        {'embeds': [{'title': 'a'}, {'title': 'b'}]},
+        {'content': 'hi'},
+    ])
+    with open(tmp_path / 'payloads.jsonl', encoding='utf-8') as file:
+        messages = list(iter_messages(file))
+    assert messages == [
+        {'content': '', 'embeds': [{'title': 'a'}]},
+        {'content': '', 'embeds': [{'title': 'b'}]},
+        {'content': 'hi'},
+    ]
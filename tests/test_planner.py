@@ -0,0 +1,76 @@
+import json
+import pytest
+from core import plan_message, message_payload, embed_creation, embed_dict_from_payload
+from planner import SendPlan, format_bytes, format_duration
+
+HOOK_A = 'https://discord.com/api/webhooks/1/token'
+HOOK_B = 'https://discord.com/api/webhooks/2/token'
+
+def make_embed(title):
+    return embed_creation(embed_dict_from_payload({'title': title}))
+
+def test_a_short_message_is_one_request():
+    planned = plan_message('', 'bot', 'hello', [], '')
+    assert planned == {
+        'requests': 1,
+        'bytes': len(json.dumps(message_payload('hello', [], 'bot')).encode()),
+        'attachment_bytes': 0,
+    }
+
+def test_a_long_message_is_planned_as_its_parts():
+    content = 'a' * 2000 + '\n' + 'b' * 2000 + '\n' + 'c' * 10
+    embeds = [make_embed(str(index)) for index in range(12)]
+    planned = plan_message('', '', content, embeds, '')
+    # Three content chunks, the last one carrying the first ten embeds,
+    # then one more request for the remaining two.
+    assert planned['requests'] == 4
+    assert planned['bytes'] > 4010
+
+def test_a_file_counts_as_attachment_bytes(tmp_path):
+    path = tmp_path / 'report.bin'
+    path.write_bytes(b'x' * 1234)
+    assert plan_message('', '', 'see file', [], str(path))['attachment_bytes'] == 1234
+    assert plan_message('', '', '', [], '', ('image.png', b'y' * 10))['attachment_bytes'] == 10
+
+def test_an_invalid_message_raises():
+    with pytest.raises(Exception):
+        plan_message('', '', '', [], '')
+
+def test_plan_totals_and_busiest_webhook():
+    plan = SendPlan()
+    for _ in range(3):
+        plan.add(HOOK_A, '', '', 'hi', [], '')
+    plan.add(HOOK_B, '', '', 'a' * 3000, [], '')
+    assert (plan.messages, plan.requests) == (4, 5)
+    assert plan.webhook_requests == {1: 3, 2: 2}
+    assert plan.bytes == sum(
+        plan_message('', '', content, [], '')['bytes'] for content in ['hi'] * 3 + ['a' * 3000]
+    )
+
+def test_duration_is_bound_by_the_busiest_webhook():
+    plan = SendPlan(global_rate=50)
+    for _ in range(10):
+        plan.add(HOOK_A, '', '', 'hi', [], '')
+    # 10 requests at 5 per 2 s, the global limit would allow them in 0.2 s.
+    assert plan.duration() == pytest.approx(4)
+
+def test_duration_is_bound_by_the_global_rate():
+    plan = SendPlan(global_rate=1)
+    for index in range(10):
+        plan.add(f'https://discord.com/api/webhooks/{index}/token', '', '', 'hi', [], '')
+    assert plan.duration() == pytest.approx(10)
+
+def test_report():
+    plan = SendPlan()
+    plan.add(HOOK_A, '', '', 'hi', [], '')
+    plan.errors.append((1, 'bad'))
+    report = plan.report()
+    assert 'messages 1  requests 1' in report
+    assert 'estimated time 0m00s' in report
+    assert '1 messages would fail' in report
+
+def test_formatting():
+    assert format_bytes(512) == '512 B'
+    assert format_bytes(1536) == '1.5 KB'
+    assert format_duration(59) == '0m59s'
+    assert format_duration(3725) == '1h02m05s'
@@ -0,0 +1,42 @@
+import json
+import pytest
+import relay
+from relay import Relay, parse_message
+
+WEBHOOK = 'https://discord.com/api/webhooks/1/' + 'a' * 68
+
+def body(**message):
+    return json.dumps({'webhook': WEBHOOK, **message}).encode()
+
+def test_a_valid_message_is_parsed():
+    message = parse_message(body(content='hi', embeds=[{'title': 't', 'color': 255}]))
+    assert message['lane'] == 'alert'
+    assert message['embeds'][0].to_dict()['color'] == 255
+
+@pytest.mark.parametrize('message', [
+    {'webhook': 'https://example.com/hook', 'content': 'hi'},
+    {'webhook': 5, 'content': 'hi'},
+    {'webhook': WEBHOOK, 'content': ['hi']},
+    {'webhook': WEBHOOK, 'content': 'hi', 'username': 1},
+    {'webhook': WEBHOOK, 'embeds': {'title': 't'}},
+    {'webhook': WEBHOOK, 'embeds': ['t']},
+    {'webhook': WEBHOOK, 'embeds': [{'title': 't', 'color': 'red'}]},
+    {'webhook': WEBHOOK, 'embeds': [{'title': 't', 'color': True}]},
+    {'webhook': WEBHOOK, 'content': 'hi', 'lane': 'urgent'},
+])
+def test_malformed_messages_are_rejected(message):
+    with pytest.raises(ValueError):
+        parse_message(json.dumps(message).encode())
+
+def test_a_failed_batch_is_parked(tmp_path, monkeypatch):
+    def fail(*args):
+        raise ConnectionError('down')
+    monkeypatch.setattr(relay, 'send', fail)
+    server = Relay(parked_path=str(tmp_path / 'relay.parked'))
+    message = parse_message(body(content='hi'))
+    server.send_batch((WEBHOOK, '', '', 'alert'), [message])
+    with open(tmp_path / 'relay.parked', encoding='utf-8') as file:
+        parked = [json.loads(line) for line in file]
+    assert [line['content'] for line in parked] == ['hi']
+    assert parked[0]['error'] == 'down'
+    assert server.parked == 1
@@ -0,0 +1,65 @@
+import json
+import pytest
+import core
+import relay
+from core import send, HTTPStatusError, PartialSendError
+from campaign import unsent_records, record_message
+
+URL = 'https://discord.com/api/webhooks/1/' + 'a' * 68
+THREE_PARTS = 'a' * 2000 + '\n' + 'b' * 2000 + '\n' + 'c' * 10
+
+@pytest.fixture
+def fail_on(monkeypatch):
+    posted = []
+    def failing(part):
+        def webhook_request(transport, method, url, payload, file=None, lane='bulk'):
+            if len(posted) == part:
+                raise HTTPStatusError('HTTP 500')
+            posted.append(payload)
+            return {'id': str(len(posted))}
+        monkeypatch.setattr(core, 'webhook_request', webhook_request)
+        monkeypatch.setattr(core, 'get_transport', lambda: None)
+        return posted
+    return failing
+
+def test_a_failed_first_part_raises_the_error_itself(fail_on):
+    fail_on(0)
+    with pytest.raises(HTTPStatusError):
+        send(URL, '', '', THREE_PARTS, [], '')
+
+def test_a_later_failure_keeps_the_delivered_parts(fail_on):
+    posted = fail_on(1)
+    with pytest.raises(PartialSendError) as raised:
+        send(URL, '', '', THREE_PARTS, [], '')
+    error = raised.value
+    assert [record['id'] for record in error.sent] == ['1']
+    assert error.sent[0]['payload']['content'] == 'a' * 2000
+    assert [part['content'] for part in error.unsent] == ['b' * 2000, 'c' * 10]
+    assert isinstance(error.error, HTTPStatusError)
+    assert len(posted) == 1
+
+def test_the_relay_parks_only_the_unsent_parts(fail_on, tmp_path):
+    fail_on(1)
+    server = relay.Relay(parked_path=str(tmp_path / 'relay.parked'))
+    message = relay.parse_message(json.dumps({'webhook': URL, 'content': THREE_PARTS}).encode())
+    server.send_batch((URL, '', '', 'alert'), [message])
+    with open(tmp_path / 'relay.parked', encoding='utf-8') as file:
+        parked = [json.loads(line) for line in file]
+    assert [line['content'] for line in parked] == ['b' * 2000, 'c' * 10]
+    assert server.requests == 1 and server.parked == 2
+
+def test_unsent_campaign_records_can_be_sent_again():
+    record = {
+        'webhook': URL,
+        'content': 'hi',
+        'embeds': [{'title': 't'}],
+        'file': 'report.pdf',
+    }
+    parts = [
+        {'content': 'one', 'embeds': []},
+        {'content': '', 'embeds': record_message(record)[4]},
+    ]
+    records = unsent_records(record, parts)
+    assert [unsent.get('file') for unsent in records] == [None, 'report.pdf']
+    assert records[1]['embeds'][0]['title'] == 't'
+    assert record_message(records[1])[4][0].to_dict() == records[1]['embeds'][0]
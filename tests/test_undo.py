@@ -0,0 +1,36 @@
+from types import MappingProxyType
+from undo import freeze, thaw, UndoStack
+
+def test_freeze_shares_unchanged_parts():
+    first = freeze({'content': 'hi', 'embeds': [{'title': 'a'}, {'title': 'b'}]})
+    second = freeze({'content': 'hi', 'embeds': [{'title': 'a'}, {'title': 'c'}]}, first)
+    assert isinstance(second, MappingProxyType)
+    assert second['embeds'][0] is first['embeds'][0]
+    assert second['embeds'][1] is not first['embeds'][1]
+    assert freeze(thaw(second), second) is second
+
+def test_freeze_empty_containers():
+    assert freeze([]) == ()
+    assert freeze({}) == {}
+
+def test_undo_and_redo():
+    stack = UndoStack()
+    stack.reset({'content': ''})
+    assert stack.push({'content': 'a'})
+    assert stack.push({'content': 'ab'})
+    assert not stack.push({'content': 'ab'})
+    assert stack.undo() == {'content': 'a'}
+    assert stack.undo() == {'content': ''}
+    assert stack.undo() is None
+    assert stack.redo() == {'content': 'a'}
+    stack.push({'content': 'x'})
+    assert stack.redo() is None
+
+def test_undo_history_is_limited():
+    stack = UndoStack(limit=2)
+    stack.reset({'n': 0})
+    for n in range(1, 5):
+        stack.push({'n': n})
+    assert stack.undo() == {'n': 3}
+    assert stack.undo() == {'n': 2}
+    assert stack.undo() is None
@@ -0,0 +1,99 @@
+import json
+import pytest
+import core
+from core import (
+    webhook_request,
+    Dispatcher,
+    HTTPStatusError,
+    TransportError,
+    TransportResponse,
+    MAX_RETRIES,
+)
+
+URL = 'https://discord.com/api/webhooks/1/token'
+
+class ScriptedTransport:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.files = []
+
+    def request(self, method, url, payload=None, file=None):
+        self.calls += 1
+        if file is not None:
+            name, data = file
+            self.files.append((name, data.read() if hasattr(data, 'read') else bytes(data)))
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(core.time, 'sleep', slept.append)
+    monkeypatch.setattr(core, '_dispatcher', Dispatcher())
+    monkeypatch.setattr(core, 'breakers', {})
+    return slept
+
+def sent():
+    return TransportResponse(200, json.dumps({'id': '1'}).encode())
+
+def test_retry_after_from_the_body(sleeps):
+    limited = TransportResponse(429, b'{"retry_after": 1.5}')
+    assert webhook_request(ScriptedTransport(limited, sent()), 'POST', URL, {}) == {'id': '1'}
+    assert sleeps == [1.5]
+
+def test_retry_after_from_the_header(sleeps):
+    limited = TransportResponse(429, b'<html>Too Many Requests</html>', {'Retry-After': '3'})
+    webhook_request(ScriptedTransport(limited, sent()), 'POST', URL, {})
+    assert sleeps == [3.0]
+
+def test_rate_limits_without_a_wait_back_off(sleeps):
+    limited = TransportResponse(429, b'')
+    webhook_request(ScriptedTransport(limited, sent()), 'POST', URL, {})
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= core.BACKOFF_CAP
+
+def test_rate_limit_retries_are_counted(sleeps):
+    transport = ScriptedTransport(TransportResponse(429, b'{"retry_after": 0}'))
+    with pytest.raises(HTTPStatusError):
+        webhook_request(transport, 'POST', URL, {})
+    assert transport.calls == MAX_RETRIES + 1
+
+def test_server_errors_raise_their_own_error_after_the_last_retry(sleeps):
+    transport = ScriptedTransport(TransportResponse(502, b'Bad Gateway'))
+    with pytest.raises(HTTPStatusError):
+        webhook_request(transport, 'POST', URL, {})
+    assert transport.calls == MAX_RETRIES + 1
+    assert core.circuit_breaker(URL).state == 'open'
+
+def test_connection_errors_raise_after_the_last_retry(sleeps):
+    transport = ScriptedTransport(TransportError('refused'))
+    with pytest.raises(TransportError):
+        webhook_request(transport, 'POST', URL, {})
+    assert transport.calls == MAX_RETRIES + 1
+
+def test_attachments_are_sent_whole_on_every_attempt(sleeps, tmp_path):
+    (tmp_path / 'notes.txt').write_bytes(b'on disk')
+    for file, expected in [
+        (('image.png', memoryview(b'in memory')), ('image.png', b'in memory')),
+        (open(tmp_path / 'notes.txt', 'rb'), ('notes.txt', b'on disk')),
+    ]:
+        transport = ScriptedTransport(TransportResponse(502, b''), sent())
+        webhook_request(transport, 'POST', URL, {}, file)
+        assert transport.files == [expected, expected]
+        if hasattr(file, 'close'):
+            file.close()
+
+def test_an_open_breaker_reads_closed_after_its_cooldown():
+    breaker = core.CircuitBreaker(cooldown=0)
+    for _ in range(core.FAILURE_THRESHOLD):
+        breaker.failure('HTTP 502')
+    assert not breaker.is_open() and breaker.cooldown_left() == 0
+    assert breaker.state == 'open'  # only allow moves it to half-open
+    assert breaker.allow() and breaker.state == 'half-open'
+
+def test_a_permanent_failure_stays_open():
+    breaker = core.CircuitBreaker(cooldown=0)
+    breaker.failure('HTTP 401', permanent=True)
+    assert breaker.is_open() and not breaker.allow()